@@ -0,0 +1,130 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (Http404, HttpResponse, HttpResponsePermanentRedirect,
+                         HttpResponseRedirect)
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from recipes.models import Tag
+from rest_framework.exceptions import (APIException, MethodNotAllowed,
+                                       NotAuthenticated, ValidationError)
+from rest_framework.settings import api_settings
+
+from . import cache, ingredient_index
+from .authentication import aauthenticate
+from .metrics import timed
+from .serializers import BaseUserSerializer
+from .services import aget_full_url
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def json_response(data, status=200, headers=None):
+    """Ответ в том же виде, что и у JSONRenderer DRF."""
+
+    return HttpResponse(
+        json.dumps(data, ensure_ascii=False, separators=(',', ':')),
+        status=status,
+        content_type='application/json',
+        headers=headers,
+    )
+
+
+def error_response(error, headers=None):
+    detail = error.detail
+    return json_response(
+        detail if isinstance(detail, (list, dict)) else {'detail': detail},
+        status=error.status_code,
+        headers=headers,
+    )
+
+
+def method_not_allowed(request):
+    return error_response(
+        MethodNotAllowed(request.method),
+        headers={'Allow': ', '.join(SAFE_METHODS)},
+    )
+
+
+async def etag_response(request, scope, get_response):
+    """Аналог condition(etag_func=cache.scope_etag(scope))."""
+
+    etag = quote_etag(await cache.ascope_etag(scope, request))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = await get_response()
+    response.headers.setdefault('ETag', etag)
+    return response
+
+
+async def tag_list(request):
+    """Список тэгов, как TagViewSet.list."""
+
+    if request.method not in SAFE_METHODS:
+        return method_not_allowed(request)
+
+    async def get_response():
+        return json_response([
+            tag async for tag in Tag.objects.values('id', 'name', 'slug')
+        ])
+
+    return await etag_response(request, cache.TAGS, get_response)
+
+
+async def ingredient_list(request):
+    """Поиск ингредиентов по префиксу, как IngredientViewSet.list."""
+
+    if request.method not in SAFE_METHODS:
+        return method_not_allowed(request)
+    try:
+        limit = ingredient_index.get_limit(request.GET)
+    except ValidationError as error:
+        return error_response(error)
+
+    async def get_response():
+        name = request.GET.get('name', '')
+        index = ingredient_index.get_index()
+        if index is None:
+            content = await sync_to_async(ingredient_index.search_database)(
+                name, limit
+            )
+        else:
+            content = index.search(name, limit)
+        return HttpResponse(content, content_type='application/json')
+
+    return await etag_response(request, cache.INGREDIENTS, get_response)
+
+
+async def current_user(request):
+    """Текущий пользователь, как CustomUserViewSet.me."""
+
+    if request.method not in SAFE_METHODS:
+        return method_not_allowed(request)
+    try:
+        result = await aauthenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+    except APIException as error:
+        return error_response(error, headers={
+            'WWW-Authenticate': api_settings.DEFAULT_AUTHENTICATION_CLASSES[
+                0
+            ]().authenticate_header(request),
+        })
+    user = result[0]
+    # Подписка на самого себя запрещена (FollowSerializer.validate_author).
+    user.is_subscribed = False
+    return json_response(
+        timed(BaseUserSerializer)(user, context={'request': request}).data
+    )
+
+
+async def redirection(request, short_url):
+    """Перенаправление с короткой ссылки, как views.redirection."""
+
+    full_link = await aget_full_url(short_url)
+    if full_link is None:
+        raise Http404('Короткая ссылка не найдена.')
+    if settings.SHORT_LINK_PERMANENT_REDIRECT:
+        return HttpResponsePermanentRedirect(full_link)
+    return HttpResponseRedirect(full_link)
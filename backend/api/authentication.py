@@ -0,0 +1,173 @@
+import threading
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.db import router
+from django.utils import timezone
+from foodgram.constants import TOKEN_DENYLIST_REFRESH
+from rest_framework.settings import api_settings as drf_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import RevokedToken, TokenUser
+
+# Поля пользователя, которые передаются в токене: их достаточно
+# для проверки прав и ответа users/me без обращения к БД.
+CLAIMS = (
+    'email',
+    'username',
+    'first_name',
+    'last_name',
+    'avatar',
+    'is_staff',
+    'is_superuser',
+)
+
+
+class Denylist:
+    """
+    Список отозванных токенов.
+
+    Записи хранятся в таблице RevokedToken, пока не истечёт срок токена.
+    Каждый процесс держит копию списка в памяти и перечитывает её
+    из БД не чаще раза в TOKEN_DENYLIST_REFRESH секунд, поэтому
+    проверка токена обычно не обращается к БД.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = frozenset()
+        self.loaded = None
+
+    def is_fresh(self):
+        return (
+            self.loaded is not None
+            and time.monotonic() - self.loaded <= TOKEN_DENYLIST_REFRESH
+        )
+
+    @staticmethod
+    def get_queryset():
+        return RevokedToken.objects.filter(
+            expires__gt=timezone.now(),
+        ).values_list('jti', flat=True)
+
+    def store(self, entries):
+        with self.lock:
+            self.entries = frozenset(entries)
+            self.loaded = time.monotonic()
+        return self.entries
+
+    def load(self):
+        return self.store(self.get_queryset())
+
+    async def aload(self):
+        return self.store([jti async for jti in self.get_queryset()])
+
+    def get_entries(self):
+        if not self.is_fresh():
+            return self.load()
+        return self.entries
+
+    def __contains__(self, jti):
+        return jti in self.get_entries()
+
+    def revoke(self, *tokens):
+        """Отзыв токенов; истёкшие записи удаляются из таблицы."""
+
+        RevokedToken.objects.filter(expires__lte=timezone.now()).delete()
+        RevokedToken.objects.bulk_create(
+            [
+                RevokedToken(
+                    jti=token[api_settings.JTI_CLAIM],
+                    expires=datetime.fromtimestamp(
+                        token['exp'], tz=dt_timezone.utc,
+                    ),
+                )
+                for token in tokens
+            ],
+            ignore_conflicts=True,
+        )
+        self.load()
+
+
+denylist = Denylist()
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh-токен с полями пользователя, которые копируются в access."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        token['avatar'] = user.avatar.name or None
+        return token
+
+
+def get_token_user(token):
+    """Пользователь из полей токена, без запроса к БД."""
+
+    try:
+        values = {
+            'id': token[api_settings.USER_ID_CLAIM],
+            **{claim: token[claim] for claim in CLAIMS},
+        }
+    except KeyError:
+        raise InvalidToken('В токене нет данных пользователя.')
+    names = [
+        field.attname for field in TokenUser._meta.concrete_fields
+        if field.attname in values
+    ]
+    user = TokenUser.from_db(
+        router.db_for_read(TokenUser),
+        names,
+        [values[name] for name in names],
+    )
+    user.token_values = {claim: values[claim] for claim in CLAIMS}
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по подписанному access-токену без запросов к БД.
+
+    Токен проверяется по подписи, сроку действия и списку отзыва
+    в памяти процесса.
+    """
+
+    stateless = True
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if token[api_settings.JTI_CLAIM] in denylist:
+            raise InvalidToken('Токен отозван.')
+        return token
+
+    def get_user(self, validated_token):
+        return get_token_user(validated_token)
+
+
+async def aauthenticate(request):
+    """
+    Аутентификация для асинхронных вьюх по DEFAULT_AUTHENTICATION_CLASSES.
+
+    Классы без обращения к БД вызываются в цикле событий, а список
+    отзыва перед этим перечитывается асинхронным ORM; остальные
+    классы - в потоке. Возвращает (user, auth) или None.
+    """
+
+    for authentication_class in drf_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authentication_class()
+        if getattr(authenticator, 'stateless', False):
+            if not denylist.is_fresh():
+                await denylist.aload()
+            result = authenticator.authenticate(request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            return result
+    return None
@@ -0,0 +1,170 @@
+import hashlib
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.core.cache import cache
+from foodgram.constants import RESPONSE_CACHE_TIMEOUT
+from recipes.models import Recipe
+from rest_framework.response import Response
+
+RECIPES = 'recipes'
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+
+
+def version_key(scope):
+    return f'response:version:{scope}'
+
+
+def get_versions(scopes):
+    """
+    Текущие версии областей кэша.
+
+    Версия - случайная строка, поэтому вытеснение ключа версии
+    не приводит к выдаче устаревших ответов.
+    """
+
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes):
+    """Асинхронный вариант get_versions."""
+
+    keys = [version_key(scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Смена версий: все закэшированные ответы областей устаревают."""
+
+    cache.delete_many([version_key(scope) for scope in scopes])
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        ':'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def get_recipe_stamp(request, pk):
+    """
+    Штамп версии рецепта для текущего пользователя.
+
+    Один запрос по первичному ключу: дата изменения рецепта,
+    публичные поля автора и признаки избранного, списка покупок
+    и подписки. Результат запоминается в запросе.
+    """
+
+    if not hasattr(request, 'recipe_stamp'):
+        request.recipe_stamp = Recipe.objects.filter(
+            pk=pk,
+        ).with_user_flags(request.user).values_list(
+            'updated_at',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'author__email',
+            'author__avatar',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'author_is_subscribed',
+        ).first()
+    return request.recipe_stamp
+
+
+def recipe_etag(request, pk, *args, **kwargs):
+    stamp = get_recipe_stamp(request, pk)
+    if stamp is None:
+        return None
+    return make_etag(
+        request.get_host(),
+        *stamp,
+        *get_versions((TAGS, INGREDIENTS)),
+    )
+
+
+def scope_etag(scope):
+    """ETag списка, который меняется только вместе с версией scope."""
+
+    def etag(request, *args, **kwargs):
+        return make_etag(
+            scope,
+            request.get_full_path(),
+            *get_versions((scope,)),
+        )
+
+    return etag
+
+
+async def ascope_etag(scope, request):
+    return make_etag(
+        scope,
+        request.get_full_path(),
+        *await aget_versions((scope,)),
+    )
+
+
+class AnonymousCacheMixin:
+    """
+    Миксин кэширования ответов list и retrieve для анонимных
+    пользователей.
+
+    Ключ строится из адреса, нормализованных параметров запроса
+    cache_query_params и версий областей cache_scopes. Запросы
+    с другими параметрами не кэшируются.
+    """
+
+    cache_scopes = ()
+    cache_query_params = ()
+
+    def get_cache_key(self, request):
+        if request.user.is_authenticated:
+            return None
+        params = request.query_params
+        if not set(params) <= set(self.cache_query_params):
+            return None
+        query = urlencode(sorted(
+            (name, value)
+            for name in params
+            for value in params.getlist(name)
+        ))
+        key = ':'.join((
+            request.get_host(),
+            request.path,
+            query,
+            *get_versions(self.cache_scopes),
+        ))
+        return 'response:' + hashlib.md5(key.encode()).hexdigest()
+
+    def get_cached_response(self, method, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        if key is None:
+            return method(request, *args, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = method(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
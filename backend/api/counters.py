@@ -0,0 +1,54 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from recipes.models import Favorite, Recipe
+from users.models import Follow, User
+
+# Счётчик: (модель, поле, связанная модель, поле связи).
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def change(model, pk, field, delta):
+    """
+    Атомарное изменение счётчика на стороне БД.
+
+    Счётчик не уходит ниже нуля, даже если уменьшение пришло
+    для уже расходящегося значения; расхождение исправит reconcile().
+    """
+
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def actual_count(related_model, related_field):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(
+                **{related_field: OuterRef('pk')}
+            ).order_by().values(related_field).annotate(
+                total=Count('pk'),
+            ).values('total')
+        ),
+        Value(0),
+    )
+
+
+def reconcile(verify=False):
+    """
+    Поиск и исправление расхождений счётчиков с фактическими данными.
+
+    Возвращает количество расходящихся строк по каждому счётчику.
+    """
+
+    drift = {}
+    for model, field, related_model, related_field in COUNTERS:
+        expected = actual_count(related_model, related_field)
+        rows = model.objects.exclude(**{field: expected})
+        drift[f'{model._meta.model_name}.{field}'] = (
+            rows.count() if verify else rows.update(**{field: expected})
+        )
+    return drift
@@ -1,15 +1,23 @@
+from api import search
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import Favorite, Recipe, ShoppingList, Tag
 
 
 class RecipeFilter(FilterSet):
-    """Кастомный фильтр для рецептов."""
+    """
+    Кастомный фильтр для рецептов.
+
+    Связанные таблицы проверяются подзапросами EXISTS, а не JOIN,
+    поэтому рецепты в выдаче не дублируются.
+    """
 
     author = filters.CharFilter(field_name='author__id')
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        method='tags_filter',
     )
     is_favorited = filters.NumberFilter(
         method='is_favorited_filter'
@@ -17,6 +25,7 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.NumberFilter(
         method='is_in_shopping_cart_filter'
     )
+    search = filters.CharFilter(method='search_filter')
 
     class Meta:
         model = Recipe
@@ -25,26 +34,42 @@ class RecipeFilter(FilterSet):
             'tags',
             'is_favorited',
             'is_in_shopping_cart',
+            'search',
+        )
+
+    def tags_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    tag__in=value,
+                    recipe=OuterRef('pk'),
+                )
+            )
         )
 
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(favorites__user=user)
+            return queryset.filter(
+                Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                )
+            )
         return queryset
 
     def is_in_shopping_cart_filter(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(shopping_list__user=user)
+            return queryset.filter(
+                Exists(
+                    ShoppingList.objects.filter(
+                        user=user, recipe=OuterRef('pk'),
+                    )
+                )
+            )
         return queryset
 
-
-class IngredientFilter(FilterSet):
-    """Кастомный фильтр для ингредиентов."""
-
-    name = filters.CharFilter(lookup_expr='istartswith')
-
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+    def search_filter(self, queryset, name, value):
+        return search.search(queryset, value)
@@ -0,0 +1,148 @@
+import concurrent.futures
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from foodgram.constants import (RECIPE_IMAGE_FORMATS, RECIPE_IMAGE_LIST_SIZE,
+                                RECIPE_IMAGE_QUALITY, RECIPE_IMAGE_SIZES)
+from PIL import Image
+from recipes.models import Recipe
+
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS,
+    thread_name_prefix='recipe-images',
+)
+pending = set()
+pending_lock = threading.Lock()
+
+
+def derivative_name(source, size, image_format):
+    stem, _ = os.path.splitext(os.path.basename(source))
+    return f'recipes/derivatives/{stem}_{size}.{image_format}'
+
+
+def render(image, size, image_format):
+    copy = image.copy()
+    copy.thumbnail((size, size))
+    if image_format == 'jpeg' and copy.mode != 'RGB':
+        copy = copy.convert('RGB')
+    content = ContentFile(b'')
+    copy.save(content, image_format, quality=RECIPE_IMAGE_QUALITY)
+    return content
+
+
+def generate_derivatives(recipe_id, source):
+    """
+    Построение уменьшенных копий картинки рецепта.
+
+    Результат сохраняется, только если картинка рецепта
+    не изменилась за время обработки.
+    """
+
+    sizes = {}
+    with default_storage.open(source) as image_file:
+        image = Image.open(image_file)
+        image.load()
+    for size in RECIPE_IMAGE_SIZES:
+        sizes[str(size)] = {}
+        for image_format in RECIPE_IMAGE_FORMATS:
+            name = default_storage.save(
+                derivative_name(source, size, image_format),
+                render(image, size, image_format),
+            )
+            sizes[str(size)][image_format] = name
+    recipe = Recipe.objects.filter(pk=recipe_id, image=source)
+    previous = recipe.values_list('image_derivatives', flat=True).first()
+    updated = recipe.update(
+        image_derivatives={'source': source, 'sizes': sizes},
+    )
+    if updated:
+        cache.bump(cache.RECIPES)
+        delete_derivatives(previous)
+    else:
+        # Картинку заменили или рецепт удалили, пока шла обработка.
+        delete_derivatives({'sizes': sizes})
+
+
+def run_in_worker(recipe_id, source):
+    try:
+        generate_derivatives(recipe_id, source)
+    except Exception:
+        logger.exception(
+            'Не удалось обработать картинку рецепта %s', recipe_id
+        )
+    finally:
+        close_old_connections()
+
+
+def submit(recipe_id, source):
+    future = executor.submit(run_in_worker, recipe_id, source)
+    with pending_lock:
+        pending.add(future)
+    future.add_done_callback(discard)
+
+
+def discard(future):
+    with pending_lock:
+        pending.discard(future)
+
+
+def wait():
+    """Ожидание всех поставленных в пул обработок картинок."""
+
+    with pending_lock:
+        futures = list(pending)
+    concurrent.futures.wait(futures)
+
+
+def schedule_derivatives(recipe):
+    """Постановка обработки картинки в пул после фиксации транзакции."""
+
+    recipe_id, source = recipe.pk, recipe.image.name
+    transaction.on_commit(lambda: submit(recipe_id, source))
+
+
+def delete_derivatives(derivatives):
+    """Удаление файлов уменьшенных копий."""
+
+    for formats in (derivatives or {}).get('sizes', {}).values():
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def schedule_delete(derivatives):
+    """Удаление уменьшенных копий после фиксации транзакции."""
+
+    if derivatives.get('sizes'):
+        transaction.on_commit(lambda: delete_derivatives(derivatives))
+
+
+def needs_derivatives(recipe):
+    return bool(recipe.image) and (
+        recipe.image_derivatives.get('source') != recipe.image.name
+    )
+
+
+def get_sizes(recipe):
+    """Готовые уменьшенные копии текущей картинки рецепта."""
+
+    if needs_derivatives(recipe):
+        return {}
+    return recipe.image_derivatives.get('sizes', {})
+
+
+def get_list_image(recipe):
+    """Картинка для списков: уменьшенная копия или, пока её нет, оригинал."""
+
+    return get_sizes(recipe).get(
+        str(RECIPE_IMAGE_LIST_SIZE), {}
+    ).get('jpeg') or recipe.image.name
@@ -0,0 +1,180 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+from django.conf import settings
+from django.db.models.functions import Lower
+from recipes.models import Ingredient
+from rest_framework.exceptions import ValidationError
+
+MAGIC = b'FGI1'
+HEADER = struct.Struct('<4sI')
+OFFSET = struct.Struct('<I')
+
+
+class IngredientIndex:
+    """
+    Отсортированный префиксный индекс ингредиентов в отображаемом файле.
+
+    Формат файла: заголовок, смещения ключей и записей (n + 1 штук),
+    ключи (название в нижнем регистре) и готовые JSON-записи,
+    каждая из которых заканчивается запятой. Записи, подходящие под
+    префикс, лежат подряд, поэтому ответ - это один срез файла.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as index_file:
+            stat = os.fstat(index_file.fileno())
+            self.stamp = (stat.st_ino, stat.st_mtime_ns)
+            self.data = mmap.mmap(
+                index_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        magic, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f'Неизвестный формат индекса: {path}')
+        self.key_offsets = HEADER.size
+        self.record_offsets = self.key_offsets + OFFSET.size * (
+            self.count + 1
+        )
+        self.keys = self.record_offsets + OFFSET.size * (self.count + 1)
+        self.records = self.keys + self._offset(self.key_offsets, self.count)
+
+    def _offset(self, table, position):
+        return OFFSET.unpack_from(
+            self.data, table + OFFSET.size * position
+        )[0]
+
+    def _key(self, position):
+        return self.data[
+            self.keys + self._offset(self.key_offsets, position):
+            self.keys + self._offset(self.key_offsets, position + 1)
+        ]
+
+    def _lower_bound(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def search(self, prefix='', limit=None):
+        """JSON-массив ингредиентов, название которых начинается с prefix."""
+
+        key = prefix.lower().encode()
+        start = self._lower_bound(key)
+        end = self._lower_bound(key + b'\xff')
+        if limit is not None:
+            end = min(end, start + limit)
+        if start >= end:
+            return b'[]'
+        return b'[' + self.data[
+            self.records + self._offset(self.record_offsets, start):
+            self.records + self._offset(self.record_offsets, end) - 1
+        ] + b']'
+
+
+def build(path=None):
+    """Построение индекса по таблице ингредиентов с атомарной заменой."""
+
+    path = path or settings.INGREDIENT_INDEX_PATH
+    entries = sorted(
+        (
+            name.lower().encode(),
+            json.dumps(
+                {
+                    'id': pk,
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                },
+                ensure_ascii=False,
+                separators=(',', ':'),
+            ).encode() + b',',
+        )
+        for pk, name, measurement_unit in Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit',
+        ).iterator()
+    )
+    key_offsets, record_offsets = [0], [0]
+    for key, record in entries:
+        key_offsets.append(key_offsets[-1] + len(key))
+        record_offsets.append(record_offsets[-1] + len(record))
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(descriptor, 'wb') as index_file:
+        index_file.write(HEADER.pack(MAGIC, len(entries)))
+        for offset in key_offsets + record_offsets:
+            index_file.write(OFFSET.pack(offset))
+        for key, _ in entries:
+            index_file.write(key)
+        for _, record in entries:
+            index_file.write(record)
+    os.replace(temp_path, path)
+
+
+_index = None
+
+
+def get_index():
+    """
+    Индекс текущего процесса или None, если файл ещё не построен.
+
+    Файл общий для всех воркеров; он строится до запуска сервера
+    (on_starting в gunicorn.conf.py) и заменяется после изменения
+    ингредиентов, замена обнаруживается по stat.
+    """
+
+    global _index
+    path = settings.INGREDIENT_INDEX_PATH
+    try:
+        stat = os.stat(path)
+        if _index is None or _index.stamp != (
+            stat.st_ino, stat.st_mtime_ns
+        ):
+            _index = IngredientIndex(path)
+    except FileNotFoundError:
+        return None
+    return _index
+
+
+def search_database(prefix='', limit=None):
+    """Тот же ответ, что и у индекса, но запросом к БД."""
+
+    return json.dumps(
+        list(
+            Ingredient.objects.filter(name__istartswith=prefix).order_by(
+                Lower('name')
+            ).values('id', 'name', 'measurement_unit')[:limit]
+        ),
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode()
+
+
+def get_limit(params):
+    """Параметр limit: None или неотрицательное целое число."""
+
+    value = params.get('limit')
+    if value in (None, ''):
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise ValidationError(
+            {'limit': 'Ожидается неотрицательное целое число.'}
+        )
+    return limit
+
+
+def search(prefix='', limit=None):
+    index = get_index()
+    if index is None:
+        return search_database(prefix, limit)
+    return index.search(prefix, limit)
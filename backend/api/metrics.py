@@ -0,0 +1,425 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from glob import glob
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.utils.functional import SimpleLazyObject
+from django.utils.functional import empty as unevaluated
+from foodgram.constants import (METRICS_DURATION_BUCKETS,
+                                METRICS_FLUSH_INTERVAL, METRICS_QUERY_BUCKETS)
+from rest_framework.fields import empty
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Показатели одного запроса, время - в секундах."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.view = None
+
+    def server_timing(self, total):
+        timings = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer * 1000:.1f}',
+        ]
+        if self.view is not None:
+            timings.append(f'view;dur={self.view * 1000:.1f}')
+        timings.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(timings)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db += time.perf_counter() - start
+
+
+def install_wrapper(sender, connection, **kwargs):
+    """
+    Учёт запросов на каждом соединении.
+
+    Обёртка ставится при подключении, а не в middleware: асинхронный
+    ORM выполняет запросы в другом потоке со своим соединением,
+    а показатели запроса доступны там через контекстную переменную.
+    """
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_wrapper)
+
+
+@contextmanager
+def serializer_timer():
+    metrics = current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.serializer += time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """Учёт времени сериализации и валидации во времени запроса."""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+    def run_validation(self, data=empty):
+        with serializer_timer():
+            return super().run_validation(data)
+
+
+@lru_cache(maxsize=None)
+def timed(serializer_class):
+    """
+    Подкласс сериалайзера с учётом времени.
+
+    Оборачивается только сериалайзер верхнего уровня, поэтому время
+    вложенных сериалайзеров не учитывается дважды.
+    """
+
+    return type(
+        serializer_class.__name__,
+        (TimedSerializerMixin, serializer_class),
+        {'__module__': serializer_class.__module__},
+    )
+
+
+class MetricsMixin:
+    """Миксин DRF-вьюсетов: время вьюсета и сериалайзеров."""
+
+    def initial(self, request, *args, **kwargs):
+        self.metrics_start = time.perf_counter()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        metrics = current.get()
+        if metrics is not None and hasattr(self, 'metrics_start'):
+            metrics.view = time.perf_counter() - self.metrics_start
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', self.get_serializer_context())
+        return timed(self.get_serializer_class())(*args, **kwargs)
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n'
+    )
+
+
+class Histograms:
+    """
+    Гистограммы Prometheus, общие для всех воркеров.
+
+    Процесс копит значения в памяти и не реже раза
+    в METRICS_FLUSH_INTERVAL секунд сохраняет их в свой файл
+    в каталоге METRICS_DIR. При выдаче файлы всех процессов
+    суммируются, поэтому ответ не зависит от того, какой воркер
+    принял запрос Prometheus. Файлы завершившихся воркеров остаются,
+    чтобы счётчики не убывали; каталог очищается при запуске сервера
+    (gunicorn.conf.py). Без METRICS_DIR отдаются значения процесса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.metrics = {}
+        self.flushed = 0
+        self.pid = None
+        self.file_name = None
+
+    def register(self, name, description, buckets):
+        self.metrics[name] = (description, buckets)
+
+    def observe(self, name, labels, value):
+        _, buckets = self.metrics[name]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            counts = self.series.setdefault(key, [0] * (len(buckets) + 2))
+            counts[bisect_left(buckets, value)] += 1
+            counts[-1] += value
+        if time.monotonic() - self.flushed >= METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def get_path(self, directory):
+        """Файл процесса; имя уникально и при повторе PID."""
+
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.file_name = f'{self.pid}-{uuid4().hex}.json'
+        return os.path.join(directory, self.file_name)
+
+    def flush(self):
+        """Сохранение значений процесса в его файл."""
+
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        with self.lock:
+            self.flushed = time.monotonic()
+            data = [
+                [name, labels, list(counts)]
+                for (name, labels), counts in self.series.items()
+            ]
+        path = self.get_path(directory)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(f'{path}.tmp', 'w') as data_file:
+                json.dump(data, data_file)
+            os.replace(f'{path}.tmp', path)
+        except OSError as error:
+            logger.warning('Метрики не сохранены в %s: %s', path, error)
+
+    def collect(self):
+        """Значения всех процессов: {(имя, метки): счётчики}."""
+
+        directory = settings.METRICS_DIR
+        if not directory:
+            with self.lock:
+                return {
+                    key: list(counts) for key, counts in self.series.items()
+                }
+        self.flush()
+        series = {}
+        for path in glob(os.path.join(directory, '*.json')):
+            try:
+                with open(path) as data_file:
+                    data = json.load(data_file)
+            except (OSError, ValueError):
+                continue
+            for name, labels, counts in data:
+                key = (name, tuple(tuple(label) for label in labels))
+                total = series.setdefault(key, [0] * len(counts))
+                for index, count in enumerate(counts):
+                    total[index] += count
+        return series
+
+    def render(self):
+        lines = []
+        series = self.collect()
+        for name, (description, buckets) in self.metrics.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (series_name, labels), counts in sorted(series.items()):
+                if series_name != name:
+                    continue
+                label_text = ','.join(
+                    f'{label}="{escape(value)}"' for label, value in labels
+                )
+                cumulative = 0
+                for bound, count in zip(
+                    [*buckets, '+Inf'], counts[:-1]
+                ):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{label_text},le="{bound}"}} '
+                        f'{cumulative}'
+                    )
+                lines.append(f'{name}_sum{{{label_text}}} {counts[-1]}')
+                lines.append(f'{name}_count{{{label_text}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Histograms()
+atexit.register(registry.flush)
+registry.register(
+    'foodgram_request_duration_seconds',
+    'Полное время обработки запроса.',
+    METRICS_DURATION_BUCKETS,
+)
+registry.register(
+    'foodgram_request_view_duration_seconds',
+    'Время работы DRF-вьюсета.',
+    METRICS_DURATION_BUCKETS,
+)
+registry.register(
+    'foodgram_request_db_duration_seconds',
+    'Время выполнения SQL-запросов.',
+    METRICS_DURATION_BUCKETS,
+)
+registry.register(
+    'foodgram_request_serializer_duration_seconds',
+    'Время сериализации и валидации.',
+    METRICS_DURATION_BUCKETS,
+)
+registry.register(
+    'foodgram_request_queries',
+    'Количество SQL-запросов.',
+    METRICS_QUERY_BUCKETS,
+)
+
+
+def get_route(request):
+    match = request.resolver_match
+    return match.view_name if match else 'unmatched'
+
+
+def shows_timing(request):
+    """
+    Server-Timing раскрывает устройство сервиса, поэтому отдаётся
+    только при DEBUG и персоналу.
+
+    Ленивый пользователь сессии не вычисляется: для запросов
+    с токеном DRF уже подставил пользователя в request.user.
+    """
+
+    if settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is unevaluated:
+        return False
+    return bool(getattr(user, 'is_staff', False))
+
+
+class MetricsMiddleware:
+    """
+    Сбор показателей запроса: количество и время SQL-запросов,
+    время вьюсета и сериалайзеров.
+
+    Показатели пишутся в лог одной JSON-строкой, накапливаются
+    в гистограммах по маршрутам и отдаются в заголовке Server-Timing
+    (см. shows_timing). Запросы потокового ответа выполняются при
+    чтении тела, поэтому для него показатели записываются после
+    отдачи тела, а заголовок не ставится.
+    Работает и в синхронном, и в асинхронном стеке middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        if response.streaming:
+            wrap = self.astream if response.is_async else self.stream
+            response.streaming_content = wrap(
+                response.streaming_content, request, response, metrics, start,
+            )
+            return response
+        total = time.perf_counter() - start
+        if shows_timing(request):
+            response['Server-Timing'] = metrics.server_timing(total)
+        self.record(request, response, metrics, total)
+        return response
+
+    def stream(self, content, request, response, metrics, start):
+        try:
+            iterator = iter(content)
+            while True:
+                token = current.set(metrics)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    current.reset(token)
+                yield chunk
+        finally:
+            self.record(
+                request, response, metrics, time.perf_counter() - start,
+            )
+
+    async def astream(self, content, request, response, metrics, start):
+        try:
+            iterator = content.__aiter__()
+            while True:
+                token = current.set(metrics)
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    current.reset(token)
+                yield chunk
+        finally:
+            self.record(
+                request, response, metrics, time.perf_counter() - start,
+            )
+
+    @staticmethod
+    def record(request, response, metrics, total):
+        route = get_route(request)
+        labels = {'route': route, 'method': request.method}
+        for name, value in (
+            ('foodgram_request_duration_seconds', total),
+            ('foodgram_request_view_duration_seconds', metrics.view),
+            ('foodgram_request_db_duration_seconds', metrics.db),
+            (
+                'foodgram_request_serializer_duration_seconds',
+                metrics.serializer,
+            ),
+            ('foodgram_request_queries', metrics.queries),
+        ):
+            if value is not None:
+                registry.observe(name, labels, value)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'view_ms': (
+                None if metrics.view is None
+                else round(metrics.view * 1000, 1)
+            ),
+            'db_ms': round(metrics.db * 1000, 1),
+            'queries': metrics.queries,
+            'serializer_ms': round(metrics.serializer * 1000, 1),
+        }))
@@ -1,7 +1,105 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from foodgram.constants import MAX_PAGE_SIZE
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class LimitPaginator(PageNumberPagination):
-    """Кастомный пагинатор на ограничение."""
+    """
+    Кастомный пагинатор на ограничение.
+
+    При наличии параметра cursor (в том числе пустого) включается
+    курсорный режим: страница выбирается по значениям полей
+    view.get_cursor_ordering() последней записи, без COUNT и OFFSET.
+    """
 
     page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_query_param in request.query_params
+            and hasattr(view, 'get_cursor_ordering')
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = view.get_cursor_ordering()
+        page_size = self.get_page_size(request)
+        cursor = request.query_params[self.cursor_query_param]
+        try:
+            if cursor:
+                queryset = queryset.filter(self.get_cursor_filter(cursor))
+            results = list(
+                queryset.order_by(*self.ordering)[:page_size + 1]
+            )
+        except (DjangoValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    @staticmethod
+    def split_field(field):
+        return field.lstrip('-'), field.startswith('-')
+
+    def encode_cursor(self, instance):
+        values = [
+            getattr(instance, self.split_field(field)[0])
+            for field in self.ordering
+        ]
+        return urlsafe_b64encode(
+            json.dumps(values, default=str).encode()
+        ).decode()
+
+    def get_cursor_filter(self, cursor):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(
+            self.ordering
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        conditions = []
+        for position, field in enumerate(self.ordering):
+            name, descending = self.split_field(field)
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            conditions.append(reduce(and_, [
+                Q(**{self.split_field(previous)[0]: value})
+                for previous, value in zip(
+                    self.ordering[:position], values[:position]
+                )
+            ], Q(**{lookup: values[position]})))
+        return reduce(or_, conditions)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
@@ -0,0 +1,144 @@
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from foodgram.constants import SEARCH_BATCH_SIZE, SEARCH_CONFIG
+from recipes.models import IngredientInRecipe, Recipe
+
+FTS_TABLE = 'recipes_recipe_fts'
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), SEARCH_BATCH_SIZE):
+        yield ids[start:start + SEARCH_BATCH_SIZE]
+
+
+def update_vectors(recipe_ids):
+    ingredient_names = IngredientInRecipe.objects.filter(
+        recipe=OuterRef('pk'),
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', delimiter=' '),
+    ).values('names')
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(
+                Subquery(ingredient_names), weight='B', config=SEARCH_CONFIG,
+            )
+            + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+        )
+    )
+
+
+def update_fts(recipe_ids):
+    ingredient_names = defaultdict(list)
+    for recipe_id, name in IngredientInRecipe.objects.filter(
+        recipe_id__in=recipe_ids,
+    ).values_list('recipe_id', 'ingredient__name'):
+        ingredient_names[recipe_id].append(name)
+    rows = [
+        (recipe_id, name, ' '.join(ingredient_names[recipe_id]), text)
+        for recipe_id, name, text in Recipe.objects.filter(
+            pk__in=recipe_ids,
+        ).values_list('id', 'name', 'text')
+    ]
+    delete_fts(recipe_ids)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text) '
+            'VALUES (%s, %s, %s, %s)',
+            rows,
+        )
+
+
+def delete_fts(recipe_ids):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+            f'({", ".join(["%s"] * len(recipe_ids))})',
+            recipe_ids,
+        )
+
+
+def update_index(recipe_ids):
+    """Обновление поискового индекса для указанных рецептов."""
+
+    for batch in batches(set(recipe_ids)):
+        if connection.vendor == 'postgresql':
+            update_vectors(batch)
+        elif connection.vendor == 'sqlite':
+            update_fts(batch)
+
+
+def remove_from_index(recipe_ids):
+    """Удаление рецептов из FTS5-таблицы (в PostgreSQL вектор в строке)."""
+
+    if connection.vendor == 'sqlite':
+        for batch in batches(set(recipe_ids)):
+            delete_fts(batch)
+
+
+def rebuild_index():
+    ids = Recipe.objects.values_list('id', flat=True)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    update_index(ids.iterator())
+
+
+def fts_query(query):
+    """
+    Запрос FTS5 из пользовательской строки.
+
+    Каждое слово ищется по префиксу: в SQLite нет русского стемминга.
+    """
+
+    return ' '.join(
+        f'"{word}"*' for word in re.findall(r'\w+', query.lower())
+    )
+
+
+def search(queryset, query):
+    """
+    Фильтрация рецептов по названию, описанию и ингредиентам.
+
+    Результаты упорядочены по релевантности, затем по дате публикации.
+    """
+
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch',
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query),
+        ).order_by('-search_rank', '-pub_date', '-id')
+    if connection.vendor == 'sqlite':
+        match = fts_query(query)
+        if not match:
+            return queryset.none()
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        return queryset.filter(
+            pk__in=RawSQL(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                (match,),
+            ),
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'AND {FTS_TABLE}.rowid = {Recipe._meta.db_table}.id',
+                (match,),
+            ),
+        ).order_by('search_rank', '-pub_date', '-id')
+    return queryset.filter(
+        Q(name__icontains=query)
+        | Q(text__icontains=query)
+        | Q(ingredients__name__icontains=query)
+    ).distinct()
@@ -1,12 +1,21 @@
 # isort: skip_file
+from django.core.files.storage import default_storage
+from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from rest_framework.validators import UniqueTogetherValidator
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 
 from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
                             ShoppingList, ShortLink, Tag)
 from foodgram.constants import BASE_USER_FIELDS_LIMIT
+from api import images, shopping_cart
+from api.authentication import UserRefreshToken, denylist
+from api.uploads import ImageUploadField
 from users.models import Follow, User
 
 
@@ -32,6 +41,8 @@ class BaseUserSerializer(serializers.ModelSerializer):
         }
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         return (
             request
@@ -46,7 +57,7 @@ class BaseUserSerializer(serializers.ModelSerializer):
 class PutUserSerializer(serializers.ModelSerializer):
     """Сериалайзер замены аватара для модели пользователей"""
 
-    avatar = Base64ImageField(allow_null=True)
+    avatar = ImageUploadField(allow_null=True)
 
     class Meta:
         model = User
@@ -62,12 +73,39 @@ class PutUserSerializer(serializers.ModelSerializer):
         return data
 
 
-class FavoriteAndShoppingDataSerializer(serializers.ModelSerializer):
+class ListImageMixin(serializers.Serializer):
     """
-    Сериалайзер для представления ответа по моделям Избранного и Корзины.
+    Миксин картинки рецепта для списков: вместо оригинала отдаются
+    уменьшенные копии.
     """
 
-    image = Base64ImageField()
+    image = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
+
+    def _build_url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_image(self, obj):
+        return self._build_url(images.get_list_image(obj))
+
+    def get_thumbnails(self, obj):
+        return {
+            size: {
+                image_format: self._build_url(name)
+                for image_format, name in formats.items()
+            }
+            for size, formats in images.get_sizes(obj).items()
+        }
+
+
+class FavoriteAndShoppingDataSerializer(
+    ListImageMixin, serializers.ModelSerializer
+):
+    """
+    Сериалайзер для представления ответа по моделям Избранного и Корзины.
+    """
 
     class Meta:
         model = Recipe
@@ -75,12 +113,12 @@ class FavoriteAndShoppingDataSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'thumbnails',
             'cooking_time',
         )
         read_only_fields = (
             'id',
             'name',
-            'image',
             'cooking_time',
         )
 
@@ -139,7 +177,6 @@ class FollowRepresentationSerializer(BaseUserSerializer):
     """Сериалайзер для представления рецептов в модели подписок."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='recipes.count')
 
     class Meta(BaseUserSerializer.Meta):
         model = User
@@ -147,11 +184,18 @@ class FollowRepresentationSerializer(BaseUserSerializer):
             BaseUserSerializer.Meta.fields[:BASE_USER_FIELDS_LIMIT] + (
                 'recipes',
                 'recipes_count',
+                'followers_count',
                 'avatar',
             )
         )
 
     def get_recipes(self, obj):
+        if hasattr(obj, 'latest_recipes'):
+            return FavoriteAndShoppingDataSerializer(
+                obj.latest_recipes,
+                many=True,
+                context=self.context,
+            ).data
         request = self.context.get('request')
         queryset = obj.recipes.all()
         limit = request.query_params.get('recipes_limit')
@@ -163,6 +207,7 @@ class FollowRepresentationSerializer(BaseUserSerializer):
         return FavoriteAndShoppingDataSerializer(
             queryset,
             many=True,
+            context=self.context,
         ).data
 
 
@@ -244,10 +289,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
 class CreateIngredientInRecipeSerializer(serializers.ModelSerializer):
     """Сериалайзер для создания ингредиента в рецепте."""
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient',
-    )
+    id = serializers.IntegerField(source='ingredient')
 
     class Meta:
         model = IngredientInRecipe
@@ -298,11 +340,27 @@ class RecipeGetSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return self._get_item(obj, Favorite)
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return self._get_item(obj, ShoppingList)
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
+
+class RecipeListSerializer(ListImageMixin, RecipeGetSerializer):
+    """Сериалайзер для списка рецептов."""
+
+    class Meta(RecipeGetSerializer.Meta):
+        fields = RecipeGetSerializer.Meta.fields + ('thumbnails',)
+
 
 class RecipeCUDSerializer(serializers.ModelSerializer):
     """Сериалайзер для создания, удаления и редактирования рецептов."""
@@ -311,11 +369,8 @@ class RecipeCUDSerializer(serializers.ModelSerializer):
         many=True,
         source='ingredients_in_recipe'
     )
-    image = Base64ImageField()
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True,
-    )
+    image = ImageUploadField()
+    tags = serializers.ListField(child=serializers.IntegerField())
 
     @staticmethod
     def _set_ingredients_and_tags(ingredients, tags, recipe):
@@ -357,8 +412,44 @@ class RecipeCUDSerializer(serializers.ModelSerializer):
                 'Нельзя добавлять одинаковые ингредиенты в рецепт.'
             )
 
+        data['tags'], data['ingredients_in_recipe'] = self._resolve(
+            tags, ingredients,
+        )
         return data
 
+    @staticmethod
+    def _resolve(tag_ids, ingredients):
+        """
+        Получение тэгов и ингредиентов одним запросом на модель.
+
+        Все несуществующие id возвращаются в одной ошибке.
+        """
+
+        tags = Tag.objects.in_bulk(tag_ids)
+        ingredient_objects = Ingredient.objects.in_bulk(
+            [ingredient['ingredient'] for ingredient in ingredients]
+        )
+        errors = {}
+        unknown_tags = [pk for pk in tag_ids if pk not in tags]
+        if unknown_tags:
+            errors['tags'] = f'Несуществующие тэги: {unknown_tags}.'
+        unknown_ingredients = [
+            ingredient['ingredient'] for ingredient in ingredients
+            if ingredient['ingredient'] not in ingredient_objects
+        ]
+        if unknown_ingredients:
+            errors['ingredients'] = (
+                f'Несуществующие ингредиенты: {unknown_ingredients}.'
+            )
+        if errors:
+            raise ValidationError(errors)
+        return [tags[pk] for pk in tag_ids], [
+            {**ingredient, 'ingredient': ingredient_objects[
+                ingredient['ingredient']
+            ]}
+            for ingredient in ingredients
+        ]
+
     def validate_image(self, data):
         if not data:
             raise serializers.ValidationError(
@@ -366,6 +457,55 @@ class RecipeCUDSerializer(serializers.ModelSerializer):
             )
         return data
 
+    @staticmethod
+    def _update_ingredients_and_tags(ingredients, tags, recipe):
+        """
+        Изменение состава рецепта по разнице с текущими записями.
+
+        Возвращает прежние и новые количества ингредиентов.
+        """
+
+        current = {
+            ingredient_in_recipe.ingredient_id: ingredient_in_recipe
+            for ingredient_in_recipe in recipe.ingredients_in_recipe.all()
+        }
+        old_amounts = {
+            ingredient_id: ingredient_in_recipe.amount
+            for ingredient_id, ingredient_in_recipe in current.items()
+        }
+        new_amounts = {
+            ingredient['ingredient'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = old_amounts.keys() - new_amounts.keys()
+        if removed:
+            # Без сигналов post_delete каждой строки: списки покупок
+            # пересчитывает shopping_cart.change_recipe, а кэш и поиск
+            # обновляют обработчики сохранения рецепта.
+            queryset = IngredientInRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed,
+            )
+            queryset._raw_delete(queryset.db)
+        changed = []
+        for ingredient_id, amount in new_amounts.items():
+            ingredient_in_recipe = current.get(ingredient_id)
+            if ingredient_in_recipe and ingredient_in_recipe.amount != amount:
+                ingredient_in_recipe.amount = amount
+                changed.append(ingredient_in_recipe)
+        IngredientInRecipe.objects.bulk_update(changed, ('amount',))
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient=ingredient['ingredient'],
+                amount=ingredient['amount'],
+            )
+            for ingredient in ingredients
+            if ingredient['ingredient'].id not in current
+        )
+        recipe.tags.set(tags)
+        return old_amounts, new_amounts
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients_in_recipe', [])
         tags = validated_data.pop('tags', [])
@@ -379,16 +519,16 @@ class RecipeCUDSerializer(serializers.ModelSerializer):
         )
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients_in_recipe', [])
         tags = validated_data.pop('tags', [])
-        instance.ingredients.clear()
-        instance.tags.clear()
-        self._set_ingredients_and_tags(
+        old_amounts, new_amounts = self._update_ingredients_and_tags(
             ingredients,
             tags,
             instance,
         )
+        shopping_cart.change_recipe(instance.pk, old_amounts, new_amounts)
         return super().update(instance, validated_data)
 
     class Meta:
@@ -403,15 +543,33 @@ class RecipeCUDSerializer(serializers.ModelSerializer):
         )
 
     def to_representation(self, instance):
+        instance = Recipe.objects.with_related().with_user_flags(
+            self.context['request'].user
+        ).get(pk=instance.pk)
         return RecipeGetSerializer(instance, context=self.context).data
 
 
+class RecipeImageSerializer(serializers.ModelSerializer):
+    """Сериалайзер для замены картинки рецепта."""
+
+    image = ImageUploadField()
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'image',
+        )
+
+
 class ShortLinkSerializer(serializers.ModelSerializer):
     """Сериалайзер для модели коротких ссылок."""
 
     class Meta:
         model = ShortLink
         fields = '__all__'
+        extra_kwargs = {
+            'full_url': {'validators': []},
+        }
 
     def create(self, validated_data):
         full_url = validated_data['full_url']
@@ -422,3 +580,55 @@ class ShortLinkSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         return {'short-link': instance}
+
+
+class TokenObtainSerializer(TokenObtainPairSerializer):
+    """Сериалайзер выдачи пары JWT-токенов по email и паролю."""
+
+    token_class = UserRefreshToken
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """
+    Сериалайзер обновления пары JWT-токенов.
+
+    Пользователь перечитывается из БД, поэтому новый access-токен
+    содержит актуальные поля; использованный refresh-токен отзывается.
+    """
+
+    refresh = serializers.CharField()
+
+    def validate(self, data):
+        refresh = UserRefreshToken(data['refresh'])
+        if refresh[api_settings.JTI_CLAIM] in denylist:
+            raise InvalidToken('Токен отозван.')
+        user = User.objects.filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True,
+        ).first()
+        if user is None or refresh.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                'Пользователь не найден или сменил пароль.'
+            )
+        denylist.revoke(refresh)
+        token = UserRefreshToken.for_user(user)
+        return {'access': str(token.access_token), 'refresh': str(token)}
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    """Сериалайзер отзыва refresh-токена текущего пользователя."""
+
+    refresh = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if 'refresh' not in data:
+            return data
+        refresh = UserRefreshToken(data['refresh'])
+        if refresh[api_settings.USER_ID_CLAIM] != self.context[
+            'request'
+        ].user.pk:
+            raise ValidationError(
+                {'refresh': 'Токен выдан другому пользователю.'}
+            )
+        return {'refresh': refresh}
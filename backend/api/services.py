@@ -1,10 +1,108 @@
-from django.shortcuts import get_object_or_404
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from foodgram.constants import (SHORT_LINK_CACHE_TIMEOUT, SHORT_LINK_LRU_SIZE,
+                                SHORT_LINK_MISS_TIMEOUT)
 from recipes.models import ShortLink
 
+MISSING = ''
+
+
+class LRUCache:
+    """Ограниченный LRU-кэш процесса со сроком жизни записей."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value, expires = self.data.get(key, (None, None))
+            if value is None:
+                return None
+            if expires is not None and expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            self.data[key] = (value, expires)
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+short_links = LRUCache(SHORT_LINK_LRU_SIZE)
+
+
+def get_shared_cache():
+    return caches[settings.SHORT_LINK_CACHE]
+
+
+def cache_key(short_url):
+    return f'short_link:{short_url}'
+
 
 def get_full_url(short_url):
-    """Функция получения полной ссылки на рецепт."""
+    """
+    Функция получения адреса перенаправления по короткой ссылке.
+
+    Сначала проверяется LRU-кэш процесса, затем общий кэш и только
+    потом БД. Отсутствующие ссылки кэшируются на короткий срок только
+    в общем кэше: LRU другого процесса не сбросить при создании ссылки.
+    Возвращает None, если ссылки нет.
+    """
+
+    url = short_links.get(short_url)
+    if url is None:
+        key = cache_key(short_url)
+        url = get_shared_cache().get(key)
+        if url is None:
+            url = ShortLink.objects.filter(
+                short_url=short_url,
+            ).values_list('redirect_url', flat=True).first() or MISSING
+            get_shared_cache().set(
+                key,
+                url,
+                SHORT_LINK_CACHE_TIMEOUT if url else SHORT_LINK_MISS_TIMEOUT,
+            )
+        if url:
+            short_links.set(short_url, url, SHORT_LINK_CACHE_TIMEOUT)
+    return url or None
+
+
+async def aget_full_url(short_url):
+    """Асинхронный вариант get_full_url для ASGI-режима."""
+
+    url = short_links.get(short_url)
+    if url is None:
+        key = cache_key(short_url)
+        url = await get_shared_cache().aget(key)
+        if url is None:
+            url = await ShortLink.objects.filter(
+                short_url=short_url,
+            ).values_list('redirect_url', flat=True).afirst() or MISSING
+            await get_shared_cache().aset(
+                key,
+                url,
+                SHORT_LINK_CACHE_TIMEOUT if url else SHORT_LINK_MISS_TIMEOUT,
+            )
+        if url:
+            short_links.set(short_url, url, SHORT_LINK_CACHE_TIMEOUT)
+    return url or None
 
-    url = get_object_or_404(ShortLink, short_url=short_url)
 
-    return url.full_url
+def forget_short_url(short_url):
+    short_links.delete(short_url)
+    get_shared_cache().delete(cache_key(short_url))
@@ -0,0 +1,339 @@
+import csv
+import io
+import json
+from functools import lru_cache
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from foodgram.constants import (SHOPPING_CART_CACHE_TIMEOUT,
+                                SHOPPING_CART_CHUNK_SIZE, SHOPPING_CART_FONT,
+                                SHOPPING_CART_FONT_SIZE,
+                                SHOPPING_CART_LINE_HEIGHT,
+                                SHOPPING_CART_MARGIN)
+from recipes.models import (IngredientInRecipe, ShoppingList,
+                            ShoppingListIngredient)
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+TITLE = 'Ваш список покупок'
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    """Однократная регистрация шрифта в рамках процесса."""
+
+    pdfmetrics.registerFont(
+        TTFont(
+            SHOPPING_CART_FONT,
+            settings.BASE_DIR / 'data/fonts/FreeSans.ttf',
+        )
+    )
+
+
+def get_ingredients(user):
+    """Суммарное количество ингредиентов в списке покупок пользователя."""
+
+    return ShoppingListIngredient.objects.filter(
+        user=user,
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        amount_of_ingredients=F('amount'),
+    ).order_by('ingredient__name')
+
+
+def aggregate_ingredients(user_ids=None):
+    """Подсчёт сумм ингредиентов по рецептам в списках покупок."""
+
+    queryset = ShoppingList.objects.filter(
+        recipe__ingredients_in_recipe__isnull=False,
+    )
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    return queryset.values(
+        'user_id',
+        ingredient_id=F('recipe__ingredients_in_recipe__ingredient_id'),
+    ).annotate(
+        total=Sum('recipe__ingredients_in_recipe__amount')
+    ).order_by()
+
+
+def get_recipe_amounts(recipe_id):
+    return dict(
+        IngredientInRecipe.objects.filter(
+            recipe_id=recipe_id,
+        ).values_list('ingredient_id', 'amount')
+    )
+
+
+def get_recipe_users(recipe_id):
+    return list(
+        ShoppingList.objects.filter(
+            recipe_id=recipe_id,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def apply_to_totals(user_ids, deltas):
+    """
+    Изменение сумм ингредиентов пользователей на deltas.
+
+    deltas - словарь {id ингредиента: изменение количества}.
+    """
+
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not user_ids or not deltas:
+        return
+    with transaction.atomic():
+        ShoppingListIngredient.objects.bulk_create(
+            [
+                ShoppingListIngredient(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    amount=0,
+                )
+                for user_id in user_ids
+                for ingredient_id, delta in deltas.items()
+                if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        totals = ShoppingListIngredient.objects.filter(
+            user_id__in=user_ids,
+            ingredient_id__in=deltas,
+        )
+        totals.update(
+            amount=F('amount') + Case(
+                *(
+                    When(ingredient_id=ingredient_id, then=Value(delta))
+                    for ingredient_id, delta in deltas.items()
+                ),
+                default=Value(0),
+            )
+        )
+        totals.filter(amount__lte=0).delete()
+    invalidate(user_ids)
+
+
+def add_recipe(user_id, recipe_id):
+    apply_to_totals((user_id,), get_recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    apply_to_totals(
+        (user_id,),
+        {
+            ingredient_id: -amount
+            for ingredient_id, amount in get_recipe_amounts(
+                recipe_id
+            ).items()
+        },
+    )
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    """Перенос изменения состава рецепта в списки покупок."""
+
+    apply_to_totals(
+        get_recipe_users(recipe_id),
+        {
+            ingredient_id: (
+                new_amounts.get(ingredient_id, 0)
+                - old_amounts.get(ingredient_id, 0)
+            )
+            for ingredient_id in old_amounts.keys() | new_amounts.keys()
+        },
+    )
+
+
+def rebuild_totals(user_ids=None, batch_size=1000):
+    """Полный пересчёт сумм ингредиентов для пользователей или всех."""
+
+    totals = ShoppingListIngredient.objects.all()
+    if user_ids is None:
+        rows = aggregate_ingredients()
+        user_ids = set(
+            totals.values_list('user_id', flat=True).distinct()
+        ) | set(
+            ShoppingList.objects.values_list('user_id', flat=True).distinct()
+        )
+    else:
+        user_ids = list(user_ids)
+        rows = aggregate_ingredients(user_ids)
+        totals = totals.filter(user_id__in=user_ids)
+    with transaction.atomic():
+        totals.delete()
+        ShoppingListIngredient.objects.bulk_create(
+            (
+                ShoppingListIngredient(
+                    user_id=row['user_id'],
+                    ingredient_id=row['ingredient_id'],
+                    amount=row['total'],
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=batch_size,
+        )
+    invalidate(user_ids)
+
+
+def find_drift():
+    """Расхождения между денормализованной таблицей и рецептами."""
+
+    expected = {
+        (row['user_id'], row['ingredient_id']): row['total']
+        for row in aggregate_ingredients().iterator()
+    }
+    actual = {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in (
+            ShoppingListIngredient.objects.values_list(
+                'user_id', 'ingredient_id', 'amount',
+            ).iterator()
+        )
+    }
+    return {
+        key: (actual.get(key), expected.get(key))
+        for key in expected.keys() | actual.keys()
+        if actual.get(key) != expected.get(key)
+    }
+
+
+def format_line(ingredient):
+    return (
+        f'{ingredient["ingredient__name"]} - '
+        f'{ingredient["amount_of_ingredients"]} '
+        f'{ingredient["ingredient__measurement_unit"]}'
+    )
+
+
+def chunked(data):
+    """Разбиение готового файла на части для потоковой отдачи."""
+
+    for start in range(0, len(data), SHOPPING_CART_CHUNK_SIZE):
+        yield data[start:start + SHOPPING_CART_CHUNK_SIZE]
+
+
+def render_pdf(ingredients):
+    """Постраничный PDF: новая страница, когда строки не помещаются."""
+
+    register_font()
+    buffer = io.BytesIO()
+    width, height = A4
+    pdf_file = canvas.Canvas(buffer, pagesize=A4)
+    pdf_file.setFont(SHOPPING_CART_FONT, SHOPPING_CART_FONT_SIZE)
+    y = height - SHOPPING_CART_MARGIN
+    pdf_file.drawString(SHOPPING_CART_MARGIN, y, TITLE)
+    y -= 2 * SHOPPING_CART_LINE_HEIGHT
+    for ingredient in ingredients:
+        if y < SHOPPING_CART_MARGIN:
+            pdf_file.showPage()
+            pdf_file.setFont(SHOPPING_CART_FONT, SHOPPING_CART_FONT_SIZE)
+            y = height - SHOPPING_CART_MARGIN
+        pdf_file.drawString(SHOPPING_CART_MARGIN, y, format_line(ingredient))
+        y -= SHOPPING_CART_LINE_HEIGHT
+    pdf_file.showPage()
+    pdf_file.save()
+    yield from chunked(buffer.getvalue())
+
+
+def render_txt(ingredients):
+    yield f'{TITLE}\n\n'.encode()
+    for ingredient in ingredients:
+        yield f'{format_line(ingredient)}\n'.encode()
+
+
+def render_csv(ingredients):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(('name', 'amount', 'measurement_unit'))
+    for ingredient in ingredients:
+        writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['amount_of_ingredients'],
+            ingredient['ingredient__measurement_unit'],
+        ))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def render_json(ingredients):
+    yield b'['
+    for index, ingredient in enumerate(ingredients):
+        yield (b',' if index else b'') + json.dumps(
+            {
+                'name': ingredient['ingredient__name'],
+                'amount': ingredient['amount_of_ingredients'],
+                'measurement_unit': ingredient[
+                    'ingredient__measurement_unit'
+                ],
+            },
+            ensure_ascii=False,
+        ).encode()
+    yield b']'
+
+
+FORMATS = {
+    'pdf': ('application/pdf', render_pdf),
+    'txt': ('text/plain; charset=utf-8', render_txt),
+    'csv': ('text/csv; charset=utf-8', render_csv),
+    'json': ('application/json', render_json),
+}
+
+
+def version_key(user_id):
+    return f'shopping_cart:version:{user_id}'
+
+
+def get_version(user_id):
+    """
+    Версия списка покупок пользователя.
+
+    Версия - случайная строка, поэтому вытеснение ключа из кэша
+    не приводит к повторному использованию старых файлов.
+    """
+
+    return cache.get_or_set(version_key(user_id), lambda: uuid4().hex)
+
+
+def invalidate(user_ids):
+    """
+    Сброс версии списка покупок для указанных пользователей.
+
+    Версия сбрасывается после фиксации транзакции: иначе параллельный
+    запрос успеет закэшировать файл по старым данным под новой версией.
+    """
+
+    keys = [version_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def export(user, file_format):
+    """
+    Генератор частей файла списка покупок.
+
+    Готовый файл кэшируется по пользователю, формату и версии списка,
+    поэтому повторная выгрузка не обращается к БД и не рендерит файл.
+    """
+
+    key = (
+        f'shopping_cart:file:{user.id}:{get_version(user.id)}:{file_format}'
+    )
+    content = cache.get(key)
+    if content is not None:
+        yield from chunked(content)
+        return
+    _, renderer = FORMATS[file_format]
+    chunks = []
+    for chunk in renderer(get_ingredients(user).iterator()):
+        chunks.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(chunks), SHOPPING_CART_CACHE_TIMEOUT)
@@ -0,0 +1,164 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingList, ShortLink, Tag)
+from users.models import Follow, TokenUser, User
+
+from . import cache, counters, images, ingredient_index, search
+from .services import forget_short_url
+from .shopping_cart import add_recipe, invalidate, remove_recipe
+
+
+@receiver(post_save, sender=ShoppingList)
+def shopping_list_added(sender, instance, created, **kwargs):
+    if created:
+        add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingList)
+def shopping_list_removed(sender, instance, **kwargs):
+    remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate(
+            instance.shopping_list.values_list('user_id', flat=True)
+        )
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def ingredient_in_recipe_changed(sender, instance, **kwargs):
+    invalidate(
+        ShoppingList.objects.filter(
+            recipe_id=instance.recipe_id,
+        ).values_list('user_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate(
+            ShoppingList.objects.filter(
+                recipe__ingredients=instance,
+            ).values_list('user_id', flat=True)
+        )
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_index_changed(sender, **kwargs):
+    transaction.on_commit(ingredient_index.build)
+
+
+@receiver((post_save, post_delete), sender=ShortLink)
+def short_link_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_short_url(instance.short_url))
+
+
+PUBLIC_USER_FIELDS = frozenset(
+    ('username', 'first_name', 'last_name', 'email', 'avatar')
+)
+
+
+def bump_on_commit(*scopes):
+    transaction.on_commit(lambda: cache.bump(*scopes))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipes_cache_changed(sender, **kwargs):
+    bump_on_commit(cache.RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_cache_changed(sender, **kwargs):
+    bump_on_commit(cache.TAGS, cache.RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_cache_changed(sender, **kwargs):
+    bump_on_commit(cache.INGREDIENTS, cache.RECIPES)
+
+
+@receiver((post_save, post_delete), sender=User)
+@receiver((post_save, post_delete), sender=TokenUser)
+def users_cache_changed(sender, update_fields=None, **kwargs):
+    if update_fields is None or PUBLIC_USER_FIELDS & set(update_fields):
+        bump_on_commit(cache.RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_image_changed(sender, instance, signal, **kwargs):
+    if signal is post_delete:
+        images.schedule_delete(instance.image_derivatives)
+    elif images.needs_derivatives(instance):
+        images.schedule_delete(instance.image_derivatives)
+        images.schedule_derivatives(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_search_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search.update_index((instance.pk,)))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_search_removed(sender, instance, **kwargs):
+    recipe_id = instance.pk
+    transaction.on_commit(lambda: search.remove_from_index((recipe_id,)))
+
+
+@receiver((post_save, post_delete), sender=IngredientInRecipe)
+def ingredient_in_recipe_search_changed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: search.update_index((instance.recipe_id,))
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_search_changed(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(
+            lambda: search.update_index(
+                instance.recipes.values_list('id', flat=True)
+            )
+        )
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    if created:
+        counters.change(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(sender, instance, **kwargs):
+    counters.change(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_added(sender, instance, created, **kwargs):
+    if created:
+        counters.change(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_removed(sender, instance, **kwargs):
+    counters.change(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_added(sender, instance, created, **kwargs):
+    if created:
+        counters.change(User, instance.author_id, 'followers_count', 1)
+        if Follow.author.is_cached(instance):
+            instance.author.followers_count += 1
+
+
+@receiver(post_delete, sender=Follow)
+def follow_removed(sender, instance, **kwargs):
+    counters.change(User, instance.author_id, 'followers_count', -1)
@@ -0,0 +1,83 @@
+import warnings
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.fields import ImageField
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Файл слишком большой.'
+    default_code = 'upload_too_large'
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Обработчик загрузки, который пишет файл во временный файл частями
+    и прерывает загрузку при превышении IMAGE_UPLOAD_MAX_SIZE.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.file.close()
+            raise UploadTooLarge()
+        return super().receive_data_chunk(raw_data, start)
+
+
+class LimitedUploadMixin:
+    """
+    Миксин вьюсетов API: загрузка файлов через
+    LimitedTemporaryFileUploadHandler.
+
+    Обработчик подключается только к вьюсетам DRF, где UploadTooLarge
+    превращается в ответ 413, а не глобально для всего сайта.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [LimitedTemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+def validate_image_header(image_file):
+    """Проверка размера файла и размеров картинки по её заголовку."""
+
+    if image_file.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise UploadTooLarge()
+    too_large = serializers.ValidationError(
+        'Максимальный размер изображения - '
+        f'{settings.IMAGE_MAX_DIMENSION} пикселей по каждой стороне.'
+    )
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(image_file) as image:
+                width, height = image.size
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise too_large
+    except (OSError, ValueError):
+        raise serializers.ValidationError('Загрузите корректное изображение.')
+    finally:
+        image_file.seek(0)
+    if max(width, height) > settings.IMAGE_MAX_DIMENSION:
+        raise too_large
+
+
+class ImageUploadField(Base64ImageField):
+    """
+    Поле картинки, принимающее строку Base64 или загруженный файл
+    (multipart или двоичное тело запроса).
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            validate_image_header(data)
+            return ImageField.to_internal_value(self, data)
+        image_file = super().to_internal_value(data)
+        if image_file is not None:
+            validate_image_header(image_file)
+        return image_file
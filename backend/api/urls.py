@@ -1,10 +1,13 @@
 # isort: skip_file
 
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
+from api import async_views
 from api.views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                       TagViewSet)
+                       TagViewSet, TokenCreateView, TokenRefreshView,
+                       TokenRevokeView, metrics_view)
 
 app_name = 'api'
 
@@ -15,7 +18,30 @@ router_v1.register(r'tags', TagViewSet, basename='tags')
 router_v1.register(r'ingredients', IngredientViewSet, basename='ingredients')
 router_v1.register(r'recipes', RecipeViewSet, basename='recipes')
 
-urlpatterns = [
+# В ASGI-режиме лёгкие эндпоинты обслуживаются асинхронными вьюхами,
+# остальные - теми же вьюсетами DRF.
+async_urlpatterns = [
+    path('tags/', async_views.tag_list),
+    path('ingredients/', async_views.ingredient_list),
+    path('users/me/', async_views.current_user),
+] if settings.ASYNC_VIEWS else []
+
+urlpatterns = async_urlpatterns + [
     path('', include(router_v1.urls)),
     path(r'auth/', include('djoser.urls.authtoken')),
+    path('metrics/', metrics_view, name='metrics'),
 ]
+
+if settings.STATELESS_AUTH:
+    urlpatterns += [
+        path(
+            'auth/jwt/create/', TokenCreateView.as_view(), name='jwt-create',
+        ),
+        path(
+            'auth/jwt/refresh/', TokenRefreshView.as_view(),
+            name='jwt-refresh',
+        ),
+        path(
+            'auth/jwt/logout/', TokenRevokeView.as_view(), name='jwt-logout',
+        ),
+    ]
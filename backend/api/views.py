@@ -1,46 +1,112 @@
 # isort: skip_file
 
-from io import BytesIO
 from urllib.parse import urlparse
 
-from django.db.models import Sum
-from django.http import FileResponse, HttpResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.db import transaction
+from django.db.models import (BooleanField, Exists, F, OuterRef, Prefetch,
+                              Value)
+from django.conf import settings
+from django.http import (Http404, HttpResponse, HttpResponsePermanentRedirect,
+                         HttpResponseRedirect, StreamingHttpResponse)
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.filters import SearchFilter
-from rest_framework.permissions import (AllowAny, IsAuthenticated,
+from rest_framework.parsers import (FileUploadParser, JSONParser,
+                                    MultiPartParser)
+from rest_framework.permissions import (AllowAny, IsAdminUser,
+                                        IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
-
-from .filters import IngredientFilter, RecipeFilter
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenViewBase
+
+from . import cache, ingredient_index, metrics, shopping_cart
+from .authentication import StatelessJWTAuthentication, denylist
+from .cache import AnonymousCacheMixin
+from .filters import RecipeFilter
+from .metrics import MetricsMixin, timed
 from .pagination import LimitPaginator
 from .permissions import IsAuthorOrAdmin
-from recipes.models import (Favorite, Ingredient,
-                            IngredientInRecipe, Recipe, ShoppingList, Tag)
-from .serializers import (FavoriteSerializer, FollowSerializer,
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingList,
+                            Tag)
+from .serializers import (FavoriteSerializer,
+                          FollowRepresentationSerializer, FollowSerializer,
                           IngredientSerializer,
                           PutUserSerializer, RecipeCUDSerializer,
-                          RecipeGetSerializer, ShortLinkSerializer,
-                          ShoppingSerializer, TagSerializer)
+                          RecipeGetSerializer, RecipeImageSerializer,
+                          RecipeListSerializer, ShortLinkSerializer,
+                          ShoppingSerializer, TagSerializer,
+                          TokenObtainSerializer, TokenRefreshSerializer,
+                          TokenRevokeSerializer)
 from .services import get_full_url
-from foodgram.settings import BASE_DIR
+from .uploads import LimitedUploadMixin
 from users.models import Follow, User
 
 
-class CustomUserViewSet(UserViewSet):
+IMAGE_PARSERS = (JSONParser, MultiPartParser, FileUploadParser)
+
+
+def get_image_data(request, field_name):
+    """Данные картинки из JSON, multipart или двоичного тела запроса."""
+
+    if 'file' in request.data and field_name not in request.data:
+        return {field_name: request.data['file']}
+    return request.data
+
+
+class CustomUserViewSet(MetricsMixin, LimitedUploadMixin, UserViewSet):
     """Вьюсет для роута users."""
 
     queryset = User.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly,)
     pagination_class = LimitPaginator
     filter_backends = (SearchFilter,)
+    search_fields = ('^username', '^first_name', '^last_name', '^email')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'subscriptions':
+            return self.get_subscriptions(queryset)
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField()),
+            )
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(user=user, author=OuterRef('pk'))
+            ),
+        )
+
+    def get_subscriptions(self, queryset):
+        recipes = Recipe.objects.defer('search_vector')
+        try:
+            recipes = recipes.latest_per_author(
+                int(self.request.query_params['recipes_limit'])
+            )
+        except (KeyError, TypeError, ValueError):
+            pass
+        return queryset.filter(
+            following__user=self.request.user,
+        ).annotate(
+            follow_id=F('following__id'),
+            is_subscribed=Value(True, output_field=BooleanField()),
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='latest_recipes'),
+        ).order_by('follow_id')
+
+    def get_cursor_ordering(self):
+        if self.action == 'subscriptions':
+            return ('follow_id',)
+        return ('username', 'email')
 
     @action(
         detail=False,
@@ -56,13 +122,14 @@ class CustomUserViewSet(UserViewSet):
         url_name='me-avatar',
         methods=('put',),
         permission_classes=(IsAuthenticated,),
+        parser_classes=IMAGE_PARSERS,
     )
     def avatar(self, request):
         if not request.data:
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        serializer = PutUserSerializer(
+        serializer = timed(PutUserSerializer)(
             request.user,
-            data=request.data,
+            data=get_image_data(request, 'avatar'),
             partial=True,
             context={'request': request},
         )
@@ -84,10 +151,11 @@ class CustomUserViewSet(UserViewSet):
         methods=('post',),
         permission_classes=(IsAuthenticated,),
     )
+    @transaction.atomic
     def subscribe(self, request, **kwargs):
         user = request.user
         author = get_object_or_404(User, pk=self.kwargs.get('id'))
-        serializer = FollowSerializer(
+        serializer = timed(FollowSerializer)(
             data={
                 'user': user.id,
                 'author': author.id,
@@ -121,9 +189,8 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def subscriptions(self, request):
-        followings = Follow.objects.filter(user=self.request.user)
-        pagination = self.paginate_queryset(followings)
-        serializer = FollowSerializer(
+        pagination = self.paginate_queryset(self.get_queryset())
+        serializer = timed(FollowRepresentationSerializer)(
             pagination,
             many=True,
             context={'request': request},
@@ -131,38 +198,78 @@ class CustomUserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(MetricsMixin, AnonymousCacheMixin, ReadOnlyModelViewSet):
     """Вьюсет для роута tags."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+    cache_scopes = (cache.TAGS,)
+
+    @method_decorator(condition(etag_func=cache.scope_etag(cache.TAGS)))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(
+    MetricsMixin, AnonymousCacheMixin, ReadOnlyModelViewSet
+):
     """Вьюсет для роута ingredients."""
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
-    search_fields = ('^name',)
     permission_classes = (AllowAny,)
     pagination_class = None
+    cache_scopes = (cache.INGREDIENTS,)
+
+    @method_decorator(
+        condition(etag_func=cache.scope_etag(cache.INGREDIENTS))
+    )
+    def list(self, request, *args, **kwargs):
+        return HttpResponse(
+            ingredient_index.search(
+                request.query_params.get('name', ''),
+                ingredient_index.get_limit(request.query_params),
+            ),
+            content_type='application/json',
+        )
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(
+    MetricsMixin, LimitedUploadMixin, AnonymousCacheMixin, ModelViewSet
+):
     """Вьюсет для роута recipes."""
 
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.defer('search_vector')
     permission_classes = (IsAuthorOrAdmin,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     pagination_class = LimitPaginator
+    cache_scopes = (cache.RECIPES,)
+    cache_query_params = (
+        'page', 'limit', 'cursor', 'tags', 'author', 'search',
+    )
 
-    def get_serializer_class(self):
+    def get_cursor_ordering(self):
+        return ('-pub_date', '-id')
+
+    @method_decorator(condition(etag_func=cache.recipe_etag))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
         if self.action in ('list', 'retrieve'):
+            return queryset.with_related().with_user_flags(
+                self.request.user
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return RecipeListSerializer
+        elif self.action == 'retrieve':
             return RecipeGetSerializer
         elif self.action == 'favorite':
             return FavoriteSerializer
@@ -170,6 +277,7 @@ class RecipeViewSet(ModelViewSet):
             return ShoppingSerializer
         return RecipeCUDSerializer
 
+    @transaction.atomic
     def post_to_list(self, request, pk):
         serializer = self.get_serializer(data=dict(recipe=pk))
         serializer.is_valid(raise_exception=True)
@@ -236,46 +344,39 @@ class RecipeViewSet(ModelViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def download_shopping_cart(self, request):
-        path_to_fonts = BASE_DIR / 'data/fonts/FreeSans.ttf'
-        buffer = BytesIO()
-        pdf_file = canvas.Canvas(buffer)
-        pdfmetrics.registerFont(
-            TTFont(
-                'FreeSans',
-                path_to_fonts,
+        file_format = request.query_params.get('file_format', 'pdf')
+        if file_format not in shopping_cart.FORMATS:
+            return Response(
+                {'file_format': list(shopping_cart.FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        content_type, _ = shopping_cart.FORMATS[file_format]
+        response = StreamingHttpResponse(
+            shopping_cart.export(request.user, file_format),
+            content_type=content_type,
         )
-        pdf_file.setFont('FreeSans', 15)
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe__shopping_list__user=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit',
-        ).annotate(amount_of_ingredients=Sum('amount'))
-
-        pdf_file.drawString(100, 750, 'Ваш список покупок')
-
-        y = 700
-        for ingredient in ingredients:
-            pdf_file.drawString(
-                100,
-                y,
-                f'{ingredient["ingredient__name"]} - '
-                f'{ingredient["amount_of_ingredients"]} '
-                f'{ingredient["ingredient__measurement_unit"]}',
-            )
-            y -= 20
-
-        pdf_file.showPage()
-        pdf_file.save()
-        buffer.seek(0)
-        response = FileResponse(
-            buffer,
-            as_attachment=True,
-            filename='shopping_list.pdf'
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{file_format}"'
         )
         return response
 
+    @action(
+        detail=True,
+        url_path='image',
+        url_name='image',
+        methods=('put',),
+        parser_classes=IMAGE_PARSERS,
+    )
+    def image(self, request, pk):
+        serializer = timed(RecipeImageSerializer)(
+            self.get_object(),
+            data=get_image_data(request, 'image'),
+            context={'request': request},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @action(
         detail=True,
         url_path='get-link',
@@ -285,7 +386,7 @@ class RecipeViewSet(ModelViewSet):
     )
     def short_link(self, request, pk):
         full_url = request.build_absolute_uri().rstrip('get-link/')
-        serializer = ShortLinkSerializer(
+        serializer = timed(ShortLinkSerializer)(
             data={'full_url': full_url}
         )
         serializer.is_valid(raise_exception=True)
@@ -303,10 +404,49 @@ class RecipeViewSet(ModelViewSet):
 def redirection(request, short_url):
     """Функция перенаправления с короткой ссылки."""
 
-    try:
-        full_link = get_full_url(short_url)
-        full_link = full_link.replace('/api', '', 1)
-        return redirect(full_link)
+    full_link = get_full_url(short_url)
+    if full_link is None:
+        raise Http404('Короткая ссылка не найдена.')
+    if settings.SHORT_LINK_PERMANENT_REDIRECT:
+        return HttpResponsePermanentRedirect(full_link)
+    return HttpResponseRedirect(full_link)
+
+
+@api_view(('GET',))
+@permission_classes((IsAdminUser,))
+def metrics_view(request):
+    """Гистограммы запросов всех воркеров в формате Prometheus."""
 
-    except Exception as error:
-        return HttpResponse(error.args)
+    return HttpResponse(
+        metrics.registry.render(), content_type=metrics.CONTENT_TYPE,
+    )
+
+
+class TokenCreateView(TokenViewBase):
+    """Выдача пары JWT-токенов."""
+
+    serializer_class = TokenObtainSerializer
+
+
+class TokenRefreshView(TokenViewBase):
+    """Обновление пары JWT-токенов."""
+
+    serializer_class = TokenRefreshSerializer
+
+
+class TokenRevokeView(TokenViewBase):
+    """Отзыв текущего access-токена и переданного refresh-токена."""
+
+    serializer_class = TokenRevokeSerializer
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        refresh = serializer.validated_data.get('refresh')
+        denylist.revoke(request.auth, *([refresh] if refresh else []))
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -2,6 +2,7 @@ BASE_USER_FIELDS_LIMIT = 6
 MAX_LENGTH_OF_USERNAME = MAX_LENGTH_OF_FIRST_NAME = 150
 MAX_LENGTH_OF_EMAIL = 254
 MAX_LENGTH_OF_LAST_NAME = 150
+MAX_LENGTH_OF_JTI = 64
 MESSAGE_FOR_USERNAME_VALIDATOR = (
     'Никнейм должен быть '
     'буквенно-цифровым'
@@ -19,3 +20,28 @@ SYMBOLS_FOR_SHORT_LINK = (
 SHORT_LINK_LENGTH = 6
 SHORTCODE_MIN = 4
 SHORTCODE_MAX = 20
+SHOPPING_CART_FONT = 'FreeSans'
+SHOPPING_CART_FONT_SIZE = 15
+SHOPPING_CART_LINE_HEIGHT = 20
+SHOPPING_CART_MARGIN = 50
+SHOPPING_CART_CHUNK_SIZE = 64 * 1024
+SHOPPING_CART_CACHE_TIMEOUT = 60 * 60 * 24
+SHORT_LINK_LRU_SIZE = 10000
+SHORT_LINK_CACHE_TIMEOUT = 60 * 60 * 24
+SHORT_LINK_MISS_TIMEOUT = 60
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+MAX_PAGE_SIZE = 100
+RECIPE_IMAGE_SIZES = (320, 640)
+RECIPE_IMAGE_LIST_SIZE = 640
+RECIPE_IMAGE_FORMATS = ('webp', 'jpeg')
+RECIPE_IMAGE_QUALITY = 80
+SEARCH_CONFIG = 'russian'
+SEARCH_BATCH_SIZE = 500
+METRICS_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS_QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+METRICS_FLUSH_INTERVAL = 5
+ADMIN_COUNT_LIMIT = 10000
+ADMIN_TEXT_LENGTH = 80
+TOKEN_DENYLIST_REFRESH = 5
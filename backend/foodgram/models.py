@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class MaintainedFieldsModel(models.Model):
+    """
+    Абстрактная модель с полями, которые обновляются только в БД
+    (счётчики через F()): save() существующей записи их не перезаписывает.
+    """
+
+    maintained_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.maintained_fields
+            ]
+        super().save(*args, **kwargs)
@@ -1,11 +1,16 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
+from api import async_views  # isort: skip
 from api.views import redirection  # isort: skip
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-    path('s/<str:short_url>/', redirection),
+    path(
+        's/<str:short_url>/',
+        async_views.redirection if settings.ASYNC_VIEWS else redirection,
+    ),
 ]
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+
+# SERVER=wsgi - синхронные воркеры, SERVER=asgi - воркеры uvicorn.
+# Число воркеров задаётся переменной WEB_CONCURRENCY.
+bind = os.getenv('BIND', '0.0.0.0:8000')
+
+if os.getenv('SERVER', 'wsgi').lower() == 'asgi':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+
+
+def on_starting(server):
+    """
+    Индекс ингредиентов строится один раз, до запуска воркеров.
+
+    Каталог файлов метрик воркеров очищается: значения прошлого
+    запуска сервера не должны попасть в новые счётчики.
+    """
+
+    metrics_dir = os.environ.setdefault(
+        'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'foodgram-metrics'),
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+    django.setup()
+    from api import ingredient_index
+    from django.db import DatabaseError, connections
+
+    try:
+        ingredient_index.build()
+    except DatabaseError as error:
+        # До первой миграции таблицы нет: поиск пойдёт в БД,
+        # пока индекс не построит import_csv.
+        server.log.warning('Индекс ингредиентов не построен: %s', error)
+    finally:
+        connections.close_all()
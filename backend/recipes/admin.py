@@ -1,11 +1,15 @@
 # isort: skip_file
 
 from django.contrib import admin
+from django.db.models.functions import Substr
+from django.utils.text import Truncator
 
-from foodgram.constants import EMPTY_VALUE, MIN_VALUE_OF_INGREDIENTS
+from api.shopping_cart import change_recipe, get_recipe_amounts
+from foodgram.constants import (ADMIN_TEXT_LENGTH, EMPTY_VALUE,
+                                MIN_VALUE_OF_INGREDIENTS)
 from .models import (Favorite, Ingredient, IngredientInRecipe,  # isort: skip
                      Recipe, ShoppingList, ShortLink, Tag)
-from .mixins import AdminMixin
+from .mixins import AdminMixin, LargeTableAdmin
 
 
 @admin.register(Tag)
@@ -25,7 +29,7 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(Ingredient)
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(LargeTableAdmin):
     """Администрирование для модели ингредиентов."""
 
     list_display = (
@@ -34,49 +38,76 @@ class IngredientAdmin(admin.ModelAdmin):
         'measurement_unit',
     )
     list_filter = (
-        'name',
         'measurement_unit',
     )
     search_fields = (
-        'name',
+        '^name',
     )
-    empty_value_display = EMPTY_VALUE
 
 
 class IngredientInLine(admin.TabularInline):
     model = IngredientInRecipe
-    extra = 5
+    extra = 1
     min_num = MIN_VALUE_OF_INGREDIENTS
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient',
+        )
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdmin):
     """Администрирование для модели рецептов."""
 
     list_display = (
         'id',
         'name',
         'author',
-        'text',
+        'short_text',
         'cooking_time',
         'image',
         'amount_of_favorites',
     )
-    list_filter = (
-        'name',
+    list_select_related = (
         'author',
+    )
+    list_filter = (
         'tags',
     )
     search_fields = (
-        'name',
-        'author',
+        '^name',
+        '^author__username',
     )
-    empty_value_display = EMPTY_VALUE
+    autocomplete_fields = ('author',)
     inlines = (IngredientInLine,)
 
-    @admin.display(description='Количество добавлений в избранное')
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(
+            'text', 'search_vector',
+        ).annotate(
+            text_start=Substr('text', 1, ADMIN_TEXT_LENGTH + 1),
+        )
+
+    @admin.display(description='Описание')
+    def short_text(self, obj):
+        return Truncator(obj.text_start).chars(ADMIN_TEXT_LENGTH)
+
+    @admin.display(
+        description='Количество добавлений в избранное',
+        ordering='favorites_count',
+    )
     def amount_of_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        if not change:
+            return super().save_related(request, form, formsets, change)
+        recipe_id = form.instance.pk
+        old_amounts = get_recipe_amounts(recipe_id)
+        super().save_related(request, form, formsets, change)
+        change_recipe(recipe_id, old_amounts, get_recipe_amounts(recipe_id))
 
 
 @admin.register(Favorite)
@@ -94,11 +125,11 @@ class ShoppingListAdmin(AdminMixin):
 
 
 @admin.register(ShortLink)
-class ShortLinkAdmin(admin.ModelAdmin):
+class ShortLinkAdmin(LargeTableAdmin):
     """Администрирование для модели коротких ссылок."""
 
     list_display = (
         'full_url',
         'short_url',
     )
-    search_fields = ('full_url', 'short_url')
+    search_fields = ('=short_url', '^full_url')
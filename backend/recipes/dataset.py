@@ -0,0 +1,161 @@
+import io
+import random
+from datetime import datetime, timedelta, timezone
+
+from api import cache, counters, ingredient_index, search, shopping_cart
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingList, Tag)
+from users.models import Follow, User
+
+PASSWORD = 'synthetic-password'
+IMAGE = 'recipes/images/synthetic.png'
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+BATCH_SIZE = 1000
+
+
+def get_image():
+    """Общая картинка всех синтетических рецептов."""
+
+    if not default_storage.exists(IMAGE):
+        content = io.BytesIO()
+        Image.new('RGB', (640, 480), (200, 120, 40)).save(content, 'png')
+        default_storage.save(IMAGE, ContentFile(content.getvalue()))
+    return IMAGE
+
+
+def generate(
+    users=100,
+    recipes=1000,
+    ingredients=500,
+    ingredients_per_recipe=8,
+    tags=10,
+    tags_per_recipe=2,
+    follows=10,
+    favorites=20,
+    carts=5,
+    seed=0,
+    prefix='synthetic',
+):
+    """
+    Детерминированный синтетический набор данных.
+
+    При одинаковых параметрах создаются одинаковые записи
+    (кроме первичных ключей). follows, favorites и carts -
+    количество подписок, избранных рецептов и рецептов в списке
+    покупок на одного пользователя. Возвращает созданных пользователей.
+    """
+
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    user_objects = User.objects.bulk_create(
+        (
+            User(
+                username=f'{prefix}-{number}',
+                email=f'{prefix}-{number}@example.com',
+                first_name=f'Имя {number}',
+                last_name=f'Фамилия {number}',
+                password=password,
+            )
+            for number in range(users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    tag_objects = Tag.objects.bulk_create(
+        Tag(name=f'{prefix}-{number}', slug=f'{prefix}-{number}')
+        for number in range(tags)
+    )
+    ingredient_objects = Ingredient.objects.bulk_create(
+        (
+            Ingredient(
+                name=f'{prefix} ингредиент {number}',
+                measurement_unit=rng.choice(('г', 'кг', 'мл', 'шт.')),
+            )
+            for number in range(ingredients)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    image = get_image()
+    recipe_objects = Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author=rng.choice(user_objects),
+                name=f'Рецепт {number}',
+                text=f'Описание рецепта {number}. ' * rng.randint(1, 20),
+                cooking_time=rng.randint(1, 180),
+                image=image,
+            )
+            for number in range(recipes)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    for number, recipe in enumerate(recipe_objects):
+        recipe.pub_date = START + timedelta(minutes=number)
+    Recipe.objects.bulk_update(
+        recipe_objects, ('pub_date',), batch_size=BATCH_SIZE,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe in recipe_objects
+            for tag in rng.sample(
+                tag_objects, min(tags_per_recipe, len(tag_objects))
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    IngredientInRecipe.objects.bulk_create(
+        (
+            IngredientInRecipe(
+                recipe=recipe,
+                ingredient=ingredient,
+                amount=rng.randint(1, 500),
+            )
+            for recipe in recipe_objects
+            for ingredient in rng.sample(
+                ingredient_objects,
+                min(ingredients_per_recipe, len(ingredient_objects)),
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Follow.objects.bulk_create(
+        (
+            Follow(user=user, author=author)
+            for user in user_objects
+            for author in [
+                author for author in rng.sample(
+                    user_objects, min(follows + 1, len(user_objects))
+                )
+                if author != user
+            ][:follows]
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    for model, count in ((Favorite, favorites), (ShoppingList, carts)):
+        model.objects.bulk_create(
+            (
+                model(user=user, recipe=recipe)
+                for user in user_objects
+                for recipe in rng.sample(
+                    recipe_objects, min(count, len(recipe_objects))
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+    # Массовая вставка не вызывает сигналы: производные данные
+    # и кэши обновляются явно.
+    user_ids = [user.pk for user in user_objects]
+    shopping_cart.rebuild_totals(user_ids, batch_size=BATCH_SIZE)
+    search.update_index(recipe.pk for recipe in recipe_objects)
+    counters.reconcile()
+    transaction.on_commit(ingredient_index.build)
+    transaction.on_commit(
+        lambda: cache.bump(cache.RECIPES, cache.TAGS, cache.INGREDIENTS)
+    )
+    return user_objects
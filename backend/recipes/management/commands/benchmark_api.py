@@ -0,0 +1,357 @@
+# isort: skip_file
+
+import base64
+import io
+import json
+import math
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api import images
+from recipes.dataset import PASSWORD
+from recipes.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingList, Tag)
+from users.models import Follow, User
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, rank):
+    """Перцентиль по методу ближайшего ранга."""
+
+    ordered = sorted(values)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_image():
+    content = io.BytesIO()
+    Image.new('RGB', (64, 64), (40, 120, 200)).save(content, 'png')
+    return 'data:image/png;base64,' + base64.b64encode(
+        content.getvalue()
+    ).decode()
+
+
+class Step:
+    """Один запрос сценария; path может зависеть от ответа предыдущего."""
+
+    def __init__(self, name, client, method, path, data=None):
+        self.name = name
+        self.client = client
+        self.method = method
+        self.path = path
+        self.data = data
+
+    def run(self, previous):
+        path = self.path(previous) if callable(self.path) else self.path
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            if self.method == 'get':
+                response = self.client.get(path)
+            else:
+                response = getattr(self.client, self.method)(
+                    path, self.data, format='json',
+                )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        elapsed = (time.perf_counter() - start) * 1000
+        # Картинки обрабатываются в фоновом потоке; в SQLite его запись
+        # параллельно со следующим запросом даёт database is locked.
+        images.wait()
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{self.name}: {response.status_code} '
+                f'{response.content[:500]!r}'
+            )
+        return response, elapsed, len(queries.captured_queries)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер эндпоинтов API на текущей БД (см. generate_dataset): '
+        'перцентили времени ответа и количество SQL-запросов '
+        'сохраняются в JSON-отчёт для сравнения между коммитами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Количество замеров на каждый запрос.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+        )
+        parser.add_argument(
+            '--user',
+            help='Email пользователя для авторизованных запросов.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл отчёта, по умолчанию - вывод в консоль.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Предыдущий отчёт для сравнения.',
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        scenarios = self.get_scenarios(user)
+        timings, query_counts, statuses = {}, {}, {}
+        for steps in scenarios:
+            for iteration in range(options['warmup'] + options['repeat']):
+                previous = None
+                for step in steps:
+                    previous, elapsed, queries = step.run(previous)
+                    if iteration < options['warmup']:
+                        continue
+                    timings.setdefault(step.name, []).append(elapsed)
+                    query_counts.setdefault(step.name, []).append(queries)
+                    statuses[step.name] = (
+                        step.method.upper(), previous.status_code,
+                    )
+
+        report = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': get_commit(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'dataset': {
+                model._meta.db_table: model.objects.count()
+                for model in (
+                    User, Follow, Tag, Ingredient, Recipe,
+                    IngredientInRecipe, Favorite, ShoppingList,
+                )
+            },
+            'endpoints': {
+                name: {
+                    'method': statuses[name][0],
+                    'status': statuses[name][1],
+                    'latency_ms': {
+                        **{
+                            f'p{rank}': round(percentile(values, rank), 2)
+                            for rank in PERCENTILES
+                        },
+                        'max': round(max(values), 2),
+                    },
+                    'queries': {
+                        'median': statistics.median(query_counts[name]),
+                        'max': max(query_counts[name]),
+                    },
+                }
+                for name, values in timings.items()
+            },
+        }
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(content)
+        else:
+            self.stdout.write(content)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as previous:
+                self.compare(json.load(previous), report)
+
+    @staticmethod
+    def get_user(email):
+        users = User.objects.filter(
+            follower__isnull=False, recipes__isnull=False,
+        )
+        if email:
+            users = User.objects.filter(email=email)
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError(
+                'Нет пользователя с подписками и рецептами: '
+                'заполните БД командой generate_dataset.'
+            )
+        return user
+
+    def get_scenarios(self, user):
+        anonymous = APIClient(HTTP_HOST='localhost')
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(user)
+
+        recipe = Recipe.objects.exclude(author=user).exclude(
+            favorites__user=user,
+        ).exclude(shopping_list__user=user).order_by('pk').first()
+        own_recipe = user.recipes.order_by('pk').first()
+        author = User.objects.exclude(pk=user.pk).exclude(
+            following__user=user,
+        ).order_by('pk').first()
+        tag = Tag.objects.order_by('pk').first()
+        ingredient = Ingredient.objects.order_by('pk').first()
+        if None in (recipe, own_recipe, author, tag, ingredient):
+            raise CommandError(
+                'Недостаточно данных: заполните БД командой generate_dataset.'
+            )
+        short_link = client.get(
+            f'/api/recipes/{recipe.pk}/get-link/'
+        ).data['short-link']
+        recipe_data = {
+            'ingredients': [
+                {'id': ingredient_id, 'amount': amount}
+                for ingredient_id, amount in (
+                    own_recipe.ingredients_in_recipe.values_list(
+                        'ingredient_id', 'amount',
+                    )
+                )
+            ],
+            'tags': list(own_recipe.tags.values_list('id', flat=True)),
+            'name': own_recipe.name,
+            'text': own_recipe.text,
+            'cooking_time': own_recipe.cooking_time,
+        }
+
+        scenarios = [
+            [Step('users: list', anonymous, 'get', '/api/users/')],
+            [Step(
+                'users: retrieve', anonymous, 'get',
+                f'/api/users/{author.pk}/',
+            )],
+            [Step('users: me', client, 'get', '/api/users/me/')],
+            [Step(
+                'users: subscriptions', client, 'get',
+                '/api/users/subscriptions/?recipes_limit=3',
+            )],
+            [
+                Step(
+                    'users: subscribe', client, 'post',
+                    f'/api/users/{author.pk}/subscribe/',
+                ),
+                Step(
+                    'users: unsubscribe', client, 'delete',
+                    f'/api/users/{author.pk}/subscribe/',
+                ),
+            ],
+            [Step('tags: list', anonymous, 'get', '/api/tags/')],
+            [Step('tags: retrieve', anonymous, 'get', f'/api/tags/{tag.pk}/')],
+            [Step(
+                'ingredients: list', anonymous, 'get',
+                f'/api/ingredients/?name={ingredient.name[:3]}',
+            )],
+            [Step(
+                'ingredients: retrieve', anonymous, 'get',
+                f'/api/ingredients/{ingredient.pk}/',
+            )],
+            [Step(
+                'recipes: list anonymous', anonymous, 'get', '/api/recipes/',
+            )],
+            [Step('recipes: list', client, 'get', '/api/recipes/')],
+            [Step(
+                'recipes: list cursor', client, 'get',
+                '/api/recipes/?cursor=',
+            )],
+            [Step(
+                'recipes: list filtered', client, 'get',
+                f'/api/recipes/?tags={tag.slug}&is_favorited=1',
+            )],
+            [Step(
+                'recipes: list author', client, 'get',
+                f'/api/recipes/?author={author.pk}',
+            )],
+            [Step(
+                'recipes: search', client, 'get',
+                f'/api/recipes/?search={recipe.name.split()[0]}',
+            )],
+            [Step(
+                'recipes: retrieve anonymous', anonymous, 'get',
+                f'/api/recipes/{recipe.pk}/',
+            )],
+            [Step(
+                'recipes: retrieve', client, 'get',
+                f'/api/recipes/{recipe.pk}/',
+            )],
+            [
+                Step(
+                    'recipes: create', client, 'post', '/api/recipes/',
+                    {**recipe_data, 'image': get_image()},
+                ),
+                Step(
+                    'recipes: delete', client, 'delete',
+                    lambda previous: f'/api/recipes/{previous.data["id"]}/',
+                ),
+            ],
+            [Step(
+                'recipes: update', client, 'patch',
+                f'/api/recipes/{own_recipe.pk}/', recipe_data,
+            )],
+            [
+                Step(
+                    'recipes: favorite', client, 'post',
+                    f'/api/recipes/{recipe.pk}/favorite/',
+                ),
+                Step(
+                    'recipes: unfavorite', client, 'delete',
+                    f'/api/recipes/{recipe.pk}/favorite/',
+                ),
+            ],
+            [
+                Step(
+                    'recipes: add to shopping cart', client, 'post',
+                    f'/api/recipes/{recipe.pk}/shopping_cart/',
+                ),
+                Step(
+                    'recipes: remove from shopping cart', client, 'delete',
+                    f'/api/recipes/{recipe.pk}/shopping_cart/',
+                ),
+            ],
+            [Step(
+                'recipes: download_shopping_cart', client, 'get',
+                '/api/recipes/download_shopping_cart/?file_format=txt',
+            )],
+            [Step(
+                'recipes: get-link', anonymous, 'get',
+                f'/api/recipes/{recipe.pk}/get-link/',
+            )],
+            [Step(
+                'short link redirect', anonymous, 'get',
+                urlparse(short_link).path,
+            )],
+        ]
+        if user.check_password(PASSWORD):
+            scenarios.append([Step(
+                'auth: token login', anonymous, 'post',
+                '/api/auth/token/login/',
+                {'email': user.email, 'password': PASSWORD},
+            )])
+        return scenarios
+
+    def compare(self, previous, current):
+        for name, result in current['endpoints'].items():
+            before = previous['endpoints'].get(name)
+            if before is None:
+                continue
+            old, new = before['latency_ms']['p50'], result['latency_ms']['p50']
+            change = (new - old) / old * 100 if old else 0
+            self.stderr.write(
+                f'{name:<36} p50 {old:8.2f} -> {new:8.2f} мс '
+                f'({change:+.0f}%), запросов '
+                f'{before["queries"]["max"]} -> {result["queries"]["max"]}'
+            )
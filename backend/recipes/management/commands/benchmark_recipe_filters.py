@@ -0,0 +1,90 @@
+# isort: skip_file
+
+import statistics
+import time
+
+from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from recipes.dataset import generate
+
+TAGS = ['bench-0', 'bench-1', 'bench-2']
+CASES = {
+    'без фильтров': {},
+    'tags (3)': {'tags': TAGS},
+    'is_favorited': {'is_favorited': 1},
+    'is_in_shopping_cart': {'is_in_shopping_cart': 1},
+    'tags + is_favorited': {'tags': TAGS, 'is_favorited': 1},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер времени ответа списка рецептов с фильтрами '
+        'на синтетических данных разного объёма. '
+        'Данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000],
+            help='Количество рецептов в наборах данных.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество запросов на каждый сценарий.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+        )
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with transaction.atomic():
+                user = generate(
+                    users=max(size // 20, 1),
+                    recipes=size,
+                    ingredients=50,
+                    ingredients_per_recipe=5,
+                    tags=10,
+                    tags_per_recipe=3,
+                    follows=0,
+                    favorites=50,
+                    carts=20,
+                    seed=options['seed'],
+                    prefix='bench',
+                )[0]
+                client = APIClient(HTTP_HOST='localhost')
+                client.force_authenticate(user)
+                for case, params in CASES.items():
+                    timings = self.measure(
+                        client, params, options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{size:>8} | {case:<22} | '
+                        f'медиана {statistics.median(timings):7.1f} мс | '
+                        f'максимум {max(timings):7.1f} мс'
+                    )
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(client, params, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get('/api/recipes/', params)
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'Запрос {params} вернул {response.status_code}: '
+                    f'{response.content.decode(errors="replace")}'
+                )
+        return timings
@@ -0,0 +1,238 @@
+# isort: skip_file
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.management.commands.benchmark_api import (PERCENTILES,
+                                                       get_commit, percentile)
+from recipes.models import Ingredient, Recipe
+from users.models import User
+
+SERVERS = ('wsgi', 'asgi')
+HOST = '127.0.0.1'
+START_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение WSGI- и ASGI-режимов на лёгких эндпоинтах '
+        '(короткая ссылка, тэги, ингредиенты, users/me): gunicorn '
+        'запускается с одинаковым числом воркеров в каждом режиме, '
+        'замеряются запросы в секунду и перцентили времени ответа. '
+        'Нагрузка подаётся из этого процесса, поэтому воркерам '
+        'стоит оставить хотя бы одно свободное ядро.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=max((os.cpu_count() or 2) - 1, 1),
+            help='Количество воркеров gunicorn в обоих режимах.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=64,
+            help='Количество одновременных соединений.',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Длительность замера каждого эндпоинта, секунды.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=float,
+            default=2,
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл отчёта в формате JSON.',
+        )
+
+    def handle(self, *args, **options):
+        requests = self.get_requests()
+        results = {}
+        for server in SERVERS:
+            with self.run_server(server, options['workers'], options['port']):
+                results[server] = {
+                    name: asyncio.run(self.load(
+                        options['port'],
+                        raw,
+                        options['concurrency'],
+                        options['warmup'],
+                        options['duration'],
+                    ))
+                    for name, raw in requests.items()
+                }
+
+        for name in requests:
+            self.stdout.write(name)
+            for server in SERVERS:
+                result = results[server][name]
+                self.stdout.write(
+                    f'  {server}: {result["rps"]:9.1f} запросов/с, '
+                    f'p50 {result["latency_ms"]["p50"]:7.2f} мс, '
+                    f'p99 {result["latency_ms"]["p99"]:7.2f} мс, '
+                    f'ошибок {result["errors"]}'
+                )
+        if options['output']:
+            report = {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'commit': get_commit(),
+                'database': settings.DATABASES['default']['ENGINE'],
+                'cpu_count': os.cpu_count(),
+                'workers': options['workers'],
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'servers': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def get_requests():
+        user = User.objects.filter(is_active=True).order_by('pk').first()
+        recipe = Recipe.objects.order_by('pk').first()
+        ingredient = Ingredient.objects.order_by('pk').first()
+        if None in (user, recipe, ingredient):
+            raise CommandError(
+                'Недостаточно данных: заполните БД командой generate_dataset.'
+            )
+        token, _ = Token.objects.get_or_create(user=user)
+        short_link = APIClient(HTTP_HOST='localhost').get(
+            f'/api/recipes/{recipe.pk}/get-link/'
+        ).data['short-link']
+        paths = {
+            'short link redirect': (urlparse(short_link).path, ''),
+            'tags: list': ('/api/tags/', ''),
+            'ingredients: list': (
+                f'/api/ingredients/?name={ingredient.name[:2]}', '',
+            ),
+            'users: me': (
+                '/api/users/me/', f'Authorization: Token {token.key}\r\n',
+            ),
+        }
+        return {
+            name: (
+                f'GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}'
+                'Connection: close\r\n\r\n'
+            ).encode()
+            for name, (path, headers) in paths.items()
+        }
+
+    @contextmanager
+    def run_server(self, server, workers, port):
+        with tempfile.TemporaryFile() as log:
+            process = subprocess.Popen(
+                (
+                    sys.executable, '-m', 'gunicorn',
+                    '-c', 'gunicorn.conf.py',
+                    '--bind', f'{HOST}:{port}',
+                    '--workers', str(workers),
+                ),
+                cwd=settings.BASE_DIR,
+                env={
+                    **os.environ,
+                    'SERVER': server,
+                    'METRICS_LOG_LEVEL': 'WARNING',
+                },
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+            try:
+                self.wait_for_port(process, port, log)
+                yield
+            finally:
+                process.terminate()
+                try:
+                    process.wait(10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    @staticmethod
+    def wait_for_port(process, port, log):
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                break
+            try:
+                socket.create_connection((HOST, port), 1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        log.seek(0)
+        raise CommandError(
+            'Сервер не запустился:\n' + log.read().decode(errors='replace')
+        )
+
+    @staticmethod
+    async def request(port, raw):
+        reader, writer = await asyncio.open_connection(HOST, port)
+        try:
+            writer.write(raw)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        return int(response.split(b' ', 2)[1])
+
+    async def load(self, port, raw, concurrency, warmup, duration):
+        """Замкнутая нагрузка: concurrency клиентов шлют запросы подряд."""
+
+        measure_from = time.perf_counter() + warmup
+        end = measure_from + duration
+        latencies = []
+        errors = 0
+
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < end:
+                start = time.perf_counter()
+                try:
+                    status = await self.request(port, raw)
+                except (OSError, IndexError, ValueError):
+                    status = None
+                elapsed = (time.perf_counter() - start) * 1000
+                if start < measure_from:
+                    continue
+                if status is None or status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(elapsed)
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        if not latencies:
+            raise CommandError('Нет успешных ответов: проверьте сервер.')
+        return {
+            'rps': round(len(latencies) / duration, 1),
+            'errors': errors,
+            'latency_ms': {
+                **{
+                    f'p{rank}': round(percentile(latencies, rank), 2)
+                    for rank in PERCENTILES
+                },
+                'max': round(max(latencies), 2),
+            },
+        }
@@ -0,0 +1,20 @@
+# isort: skip_file
+
+from django.core.management.base import BaseCommand
+
+from api.images import generate_derivatives, needs_derivatives
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Построение недостающих уменьшенных копий картинок рецептов.'
+
+    def handle(self, *args, **options):
+        built = 0
+        for recipe in Recipe.objects.only(
+            'id', 'image', 'image_derivatives',
+        ).iterator():
+            if needs_derivatives(recipe):
+                generate_derivatives(recipe.pk, recipe.image.name)
+                built += 1
+        self.stdout.write(f'Обработано картинок: {built}.')
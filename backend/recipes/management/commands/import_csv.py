@@ -1,28 +1,131 @@
 # isort: skip_file
 
 import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 
-from recipes.models import Ingredient
+from api import cache, ingredient_index
+from recipes.models import Ingredient, Tag
+
+MODELS = {
+    'ingredients': (Ingredient, ('name', 'measurement_unit')),
+    'tags': (Tag, ('name', 'slug')),
+}
+MAX_REPORTED_ROWS = 20
 
 
 class Command(BaseCommand):
-    help = 'Импорт данных из csv файлов в БД.'
+    help = 'Импорт данных из csv и json файлов в БД.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=MODELS,
+            default='ingredients',
+            help='Импортируемые данные.',
+        )
+        parser.add_argument(
+            '--path',
+            help='Путь к файлу, по умолчанию data/<model>.csv.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'json'),
+            help='Формат файла, по умолчанию - по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+        )
 
     def handle(self, *args, **options):
-        self.import_ingredients()
+        model, fields = MODELS[options['model']]
+        path = Path(
+            options['path']
+            or settings.BASE_DIR / 'data' / f'{options["model"]}.csv'
+        )
+        file_format = options['format'] or path.suffix.lstrip('.')
+        if file_format not in ('csv', 'json'):
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        if not path.exists():
+            raise CommandError(f'Файл не найден: {path}')
+
+        start = time.monotonic()
+        count_before = model.objects.count()
+        rejected = []
+        with open(path, 'r', encoding='utf-8') as data_file:
+            rows = self.clean(
+                (
+                    self.read_csv(data_file, fields) if file_format == 'csv'
+                    else self.read_json(data_file, fields)
+                ),
+                fields,
+                rejected,
+            )
+            try:
+                total = self.load(model, rows, options['batch_size'])
+            except (KeyError, TypeError, ValueError) as error:
+                raise CommandError(f'Некорректные данные в {path}: {error}')
+        inserted = model.objects.count() - count_before
+        elapsed = time.monotonic() - start
+
+        if model is Ingredient:
+            ingredient_index.build()
+            cache.bump(cache.INGREDIENTS)
+        else:
+            cache.bump(cache.TAGS)
+        for line, values in rejected[:MAX_REPORTED_ROWS]:
+            self.stderr.write(
+                f'Строка {line} отклонена: нужно {len(fields)} непустых '
+                f'поля ({", ".join(fields)}), получено {values}.'
+            )
+        self.stdout.write(
+            f'Обработано строк: {total}, добавлено: {inserted}, '
+            f'пропущено: {total - inserted}, '
+            f'отклонено: {len(rejected)}, '
+            f'{total / elapsed if elapsed else total:.0f} строк/с.'
+        )
+
+    @staticmethod
+    def read_csv(data_file, fields):
+        reader = csv.reader(data_file)
+        for row in reader:
+            if tuple(row) == fields or not any(
+                cell.strip() for cell in row
+            ):
+                continue
+            yield reader.line_num, row
+
+    @staticmethod
+    def read_json(data_file, fields):
+        for number, row in enumerate(json.load(data_file), 1):
+            yield number, [row[field] for field in fields]
 
-    def import_ingredients(self):
-        file_path = 'data/ingredients.csv'
+    @staticmethod
+    def clean(rows, fields, rejected):
+        """Строки с другим числом полей или пустым полем отклоняются."""
 
-        with open(file_path, 'r', encoding='utf-8') as csv_file:
-            reader = csv.reader(csv_file)
-            next(reader)
+        for line, values in rows:
+            if len(values) != len(fields) or not all(
+                str(value).strip() for value in values
+            ):
+                rejected.append((line, values))
+                continue
+            yield dict(zip(fields, values))
 
-            for row in reader:
-                ingredient = Ingredient.objects.create(
-                    name=row[0],
-                    measurement_unit=row[1]
-                )
-                ingredient.save()
+    @staticmethod
+    def load(model, rows, batch_size):
+        total = 0
+        while batch := list(islice(rows, batch_size)):
+            model.objects.bulk_create(
+                [model(**row) for row in batch],
+                ignore_conflicts=True,
+            )
+            total += len(batch)
+        return total
@@ -0,0 +1,13 @@
+# isort: skip_file
+
+from django.core.management.base import BaseCommand
+
+from api.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Полное перестроение поискового индекса рецептов.'
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write('Поисковый индекс перестроен.')
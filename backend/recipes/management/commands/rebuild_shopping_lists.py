@@ -0,0 +1,38 @@
+# isort: skip_file
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.shopping_cart import find_drift, rebuild_totals
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт суммарного количества ингредиентов '
+        'в списках покупок пользователей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить расхождения, не пересчитывая таблицу.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            rebuild_totals(batch_size=options['batch_size'])
+            self.stdout.write('Списки покупок пересчитаны.')
+        drift = find_drift()
+        for (user_id, ingredient_id), (actual, expected) in drift.items():
+            self.stderr.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'{actual} вместо {expected}'
+            )
+        if drift:
+            raise CommandError(f'Найдено расхождений: {len(drift)}.')
+        self.stdout.write('Расхождений не найдено.')
@@ -0,0 +1,26 @@
+# isort: skip_file
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка счётчиков избранного, рецептов и подписчиков '
+        'с фактическими данными и исправление расхождений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить расхождения, не исправляя их.',
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile(verify=options['verify'])
+        for counter, rows in drift.items():
+            self.stdout.write(f'{counter}: расхождений {rows}')
+        if options['verify'] and any(drift.values()):
+            raise CommandError('Найдены расхождения счётчиков.')
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:21
+
+from django.db import migrations, models
+
+
+def delete_duplicate_links(apps, schema_editor):
+    ShortLink = apps.get_model('recipes', 'ShortLink')
+    first_ids = ShortLink.objects.values('full_url').annotate(
+        first_id=models.Min('id'),
+    ).values('first_id')
+    ShortLink.objects.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_shoppinglistingredient'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_links,
+            migrations.RunPython.noop,
+        ),
+        migrations.AlterField(
+            model_name='shortlink',
+            name='full_url',
+            field=models.URLField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='shortlink',
+            name='short_url',
+            field=models.CharField(blank=True, max_length=20, unique=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:21
+
+from django.db import migrations, models
+
+
+def fill_redirect_url(apps, schema_editor):
+    ShortLink = apps.get_model('recipes', 'ShortLink')
+    links = list(ShortLink.objects.all())
+    for link in links:
+        link.redirect_url = link.full_url.replace('/api', '', 1)
+    ShortLink.objects.bulk_update(links, ('redirect_url',), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_shortlink_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shortlink',
+            name='redirect_url',
+            field=models.URLField(blank=True, verbose_name='Адрес перенаправления'),
+        ),
+        migrations.RunPython(fill_redirect_url, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:32
+
+from django.db import migrations, models
+
+# Выражение совпадает с тем, что Django строит для name__istartswith.
+INGREDIENT_NAME_INDEX = {
+    'postgresql': (
+        'CREATE INDEX ingredient_name_prefix_idx ON recipes_ingredient '
+        '(UPPER(name::text) text_pattern_ops)'
+    ),
+    'sqlite': (
+        'CREATE INDEX ingredient_name_prefix_idx ON recipes_ingredient '
+        '(name COLLATE NOCASE)'
+    ),
+}
+
+
+def create_ingredient_name_index(apps, schema_editor):
+    statement = INGREDIENT_NAME_INDEX.get(schema_editor.connection.vendor)
+    if statement:
+        schema_editor.execute(statement)
+
+
+def drop_ingredient_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor in INGREDIENT_NAME_INDEX:
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS ingredient_name_prefix_idx'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            create_ingredient_name_index, drop_ingredient_name_index,
+        ),
+    ]
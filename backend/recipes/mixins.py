@@ -1,15 +1,70 @@
 # isort: skip_file
 
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
-from foodgram.constants import EMPTY_VALUE
+from foodgram.constants import ADMIN_COUNT_LIMIT, EMPTY_VALUE
 
 
-class AdminMixin(admin.ModelAdmin):
+def estimate_count(queryset):
+    """Оценка количества строк таблицы по статистике PostgreSQL."""
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор без полного COUNT(*).
+
+    Для списка без фильтров в PostgreSQL берётся оценка планировщика,
+    в остальных случаях строки считаются не дальше ADMIN_COUNT_LIMIT.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate > ADMIN_COUNT_LIMIT:
+                return estimate
+        return queryset[:ADMIN_COUNT_LIMIT].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Администрирование больших таблиц без полного подсчёта строк."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = EMPTY_VALUE
+
+
+class AdminMixin(LargeTableAdmin):
     """Миксин для класса администрирования."""
 
     list_display = (
         'user',
         'recipe',
     )
-    empty_value_display = EMPTY_VALUE
+    list_select_related = (
+        'user',
+        'recipe',
+    )
+    autocomplete_fields = (
+        'user',
+        'recipe',
+    )
+    search_fields = (
+        '^user__username',
+        '^recipe__name',
+    )
@@ -1,10 +1,16 @@
 # isort: skip_file
 
-import random
+import hashlib
+import hmac
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (BooleanField, Exists, F, OuterRef, Prefetch,
+                              Value, Window)
+from django.db.models.functions import RowNumber
 
 from foodgram.constants import (
     MAX_LENGTH_OF_INGREDIENT,
@@ -17,8 +23,10 @@ from foodgram.constants import (
     MIN_TIME_OF_COOKING,
     MIN_VALUE_OF_INGREDIENTS,
     SHORT_LINK_LENGTH,
+    SHORTCODE_MAX,
     SYMBOLS_FOR_SHORT_LINK
 )
+from foodgram.models import MaintainedFieldsModel
 
 
 User = get_user_model()
@@ -74,7 +82,60 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    """Кастомный QuerySet для рецептов."""
+
+    def with_related(self):
+        """Подгрузка автора, тэгов и ингредиентов пачкой запросов."""
+
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_in_recipe',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
+    def with_user_flags(self, user):
+        """
+        Аннотация признаков избранного, списка покупок и подписки
+        на автора для текущего пользователя.
+        """
+
+        if not user.is_authenticated:
+            false = Value(False, output_field=BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                author_is_subscribed=false,
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingList.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            author_is_subscribed=Exists(
+                user.follower.filter(author=OuterRef('author'))
+            ),
+        )
+
+    def latest_per_author(self, limit):
+        """Не более limit последних рецептов каждого автора."""
+
+        return self.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F('author'),
+                order_by=F('pub_date').desc(),
+            )
+        ).filter(row_number__lte=limit)
+
+
+class Recipe(MaintainedFieldsModel):
     """Модель для рецептов."""
 
     ingredients = models.ManyToManyField(
@@ -93,6 +154,12 @@ class Recipe(models.Model):
         upload_to='recipes/images/',
         default=None,
     )
+    image_derivatives = models.JSONField(
+        verbose_name='Уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     name = models.CharField(
         verbose_name='Название рецепта',
         max_length=MAX_LENGTH_OF_RECIPE,
@@ -129,11 +196,40 @@ class Recipe(models.Model):
         verbose_name='Дата публикации рецепта',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения рецепта',
+        auto_now=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
+    maintained_fields = (
+        'favorites_count', 'search_vector', 'image_derivatives',
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='recipe_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -213,6 +309,12 @@ class Favorite(FavoriteShoppingMixin):
                 name='unique_recipe_favorite',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favorite_recipe_user_idx',
+            )
+        ]
 
     def __str__(self):
         return f'Пользователь: {self.user.username} Рецепт: {self.recipe.name}'
@@ -231,36 +333,108 @@ class ShoppingList(FavoriteShoppingMixin):
                 name='unique_recipe_shopping_list',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='shopping_list_recipe_user_idx',
+            )
+        ]
 
     def __str__(self):
         return f'Пользователь: {self.user.username} Рецепт: {self.recipe.name}'
 
 
+class ShoppingListIngredient(models.Model):
+    """
+    Денормализованная модель суммарного количества ингредиентов
+    в списке покупок пользователя.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+    )
+    amount = models.IntegerField(
+        verbose_name='Суммарное количество',
+    )
+
+    class Meta:
+        default_related_name = 'shopping_list_ingredients'
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списке покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_ingredient',
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f'Пользователь: {self.user.username} '
+            f'Ингредиент: {self.ingredient.name} - {self.amount}'
+        )
+
+
 class ShortLink(models.Model):
     """Модель для коротких ссылок."""
 
-    full_url = models.URLField()
+    full_url = models.URLField(
+        unique=True,
+    )
     short_url = models.CharField(
-        max_length=SHORT_LINK_LENGTH,
-        db_index=True,
+        max_length=SHORTCODE_MAX,
+        unique=True,
+        blank=True,
+    )
+    redirect_url = models.URLField(
+        verbose_name='Адрес перенаправления',
         blank=True,
     )
 
-    def save(self, *args, **kwargs):
+    @staticmethod
+    def make_short_url(full_url, length=SHORT_LINK_LENGTH):
+        """
+        Детерминированный короткий код: HMAC полной ссылки в алфавите
+        SYMBOLS_FOR_SHORT_LINK.
+        """
+
+        number = int.from_bytes(
+            hmac.new(
+                settings.SECRET_KEY.encode(),
+                full_url.encode(),
+                hashlib.sha256,
+            ).digest(),
+            'big',
+        )
+        symbols = []
+        for _ in range(length):
+            number, index = divmod(number, len(SYMBOLS_FOR_SHORT_LINK))
+            symbols.append(SYMBOLS_FOR_SHORT_LINK[index])
+        return ''.join(symbols)
 
-        if not self.short_url:
-            while True:
-                self.short_url = ''.join(
-                    random.choices(
-                        SYMBOLS_FOR_SHORT_LINK,
-                        k=SHORT_LINK_LENGTH,
-                    )
-                )
-                if not ShortLink.objects.filter(
-                    short_url=self.short_url
-                ).exists():
-                    break
-        super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        if not self.redirect_url:
+            self.redirect_url = self.full_url.replace('/api', '', 1)
+        if self.short_url:
+            return super().save(*args, **kwargs)
+        for length in range(SHORT_LINK_LENGTH, SHORTCODE_MAX + 1):
+            self.short_url = self.make_short_url(self.full_url, length)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if ShortLink.objects.filter(full_url=self.full_url).exists():
+                    raise
+        raise IntegrityError(
+            f'Не удалось создать короткую ссылку для {self.full_url}'
+        )
 
     class Meta:
         verbose_name = 'Короткая ссылка'
@@ -0,0 +1,53 @@
+import pytest
+from django.core.cache import cache
+from recipes.dataset import generate
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    settings.INGREDIENT_INDEX_PATH = tmp_path / 'ingredients.idx'
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def users(db):
+    return generate(
+        users=6,
+        recipes=40,
+        ingredients=30,
+        ingredients_per_recipe=4,
+        tags=4,
+        tags_per_recipe=2,
+        follows=4,
+        favorites=3,
+        carts=2,
+        prefix='test',
+    )
+
+
+@pytest.fixture
+def user(users):
+    return users[0]
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+    return client
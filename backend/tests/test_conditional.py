@@ -0,0 +1,22 @@
+from django.utils.http import http_date
+from recipes.models import Favorite, Recipe
+
+
+def test_recipe_detail_changes_with_favorite(user, user_client):
+    recipe = Recipe.objects.exclude(favorites__user=user).first()
+    url = f'/api/recipes/{recipe.pk}/'
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert response.data['is_favorited'] is False
+    etag = response['ETag']
+    assert 'Last-Modified' not in response
+
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    Favorite.objects.create(user=user, recipe=recipe)
+    for headers in (
+        {'HTTP_IF_NONE_MATCH': etag},
+        {'HTTP_IF_MODIFIED_SINCE': http_date(recipe.updated_at.timestamp())},
+    ):
+        response = user_client.get(url, **headers)
+        assert response.status_code == 200
+        assert response.data['is_favorited'] is True
@@ -0,0 +1,31 @@
+import pytest
+from django.core.management import call_command
+from recipes.models import Ingredient
+
+
+@pytest.fixture
+def import_csv(db, tmp_path, capsys):
+    def run(content):
+        path = tmp_path / 'ingredients.csv'
+        path.write_text(content, encoding='utf-8')
+        call_command('import_csv', path=str(path))
+        return capsys.readouterr()
+    return run
+
+
+def test_blank_lines_are_skipped(import_csv):
+    output = import_csv('name,measurement_unit\nлук,г\n\n,\nсоль,г\n')
+    assert sorted(Ingredient.objects.values_list('name', flat=True)) == [
+        'лук', 'соль',
+    ]
+    assert 'отклонено: 0' in output.out
+
+
+@pytest.mark.parametrize('row', ('лук', 'лук,г,шт.', ',г', 'лук, '))
+def test_malformed_rows_are_rejected(import_csv, row):
+    output = import_csv(f'соль,г\n{row}\n')
+    assert list(Ingredient.objects.values_list('name', flat=True)) == [
+        'соль',
+    ]
+    assert 'отклонено: 1' in output.out
+    assert 'Строка 2 отклонена' in output.err
@@ -0,0 +1,25 @@
+import pytest
+from api import ingredient_index
+
+
+@pytest.fixture(params=(False, True), ids=('database', 'index'))
+def index(request, users):
+    if request.param:
+        ingredient_index.build()
+    return request.param
+
+
+@pytest.mark.parametrize('limit', ('-1', 'abc', '1.5'))
+def test_invalid_limit(client, index, limit):
+    response = client.get('/api/ingredients/', {'limit': limit})
+    assert response.status_code == 400
+    assert 'limit' in response.json()
+
+
+@pytest.mark.parametrize('limit', (0, 2))
+def test_limit(client, index, limit):
+    response = client.get(
+        '/api/ingredients/', {'name': 'test', 'limit': limit}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == limit
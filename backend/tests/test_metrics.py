@@ -0,0 +1,26 @@
+from api.metrics import Histograms
+
+
+def make_worker():
+    histograms = Histograms()
+    histograms.register('test_seconds', 'Тест.', (1,))
+    return histograms
+
+
+def test_histograms_are_merged_across_workers(settings, tmp_path):
+    settings.METRICS_DIR = tmp_path
+    first, second = make_worker(), make_worker()
+    first.observe('test_seconds', {'route': 'recipes'}, 0.5)
+    second.observe('test_seconds', {'route': 'recipes'}, 2)
+    for worker in (first, second):
+        text = worker.render()
+        assert 'test_seconds_bucket{route="recipes",le="1"} 1' in text
+        assert 'test_seconds_count{route="recipes"} 2' in text
+        assert 'test_seconds_sum{route="recipes"} 2.5' in text
+
+
+def test_histograms_without_directory(settings):
+    settings.METRICS_DIR = None
+    worker = make_worker()
+    worker.observe('test_seconds', {'route': 'recipes'}, 0.5)
+    assert 'test_seconds_count{route="recipes"} 1' in worker.render()
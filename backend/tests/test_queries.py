@@ -0,0 +1,108 @@
+"""Количество запросов к БД не зависит от размера страницы."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Recipe
+
+# Запрос токена + COUNT + страница + теги + ингредиенты.
+RECIPE_LIST_QUERIES = 5
+# Запрос токена + ETag + рецепт + теги + ингредиенты.
+RECIPE_DETAIL_QUERIES = 5
+# Запрос токена + COUNT + авторы + рецепты авторов.
+SUBSCRIPTIONS_QUERIES = 4
+# Запрос токена + COUNT + страница.
+USER_LIST_QUERIES = 3
+# Запрос токена + рецепт, автор, теги и ингредиенты запроса
+# + изменение рецепта в точке сохранения + рецепт, теги и ингредиенты ответа.
+RECIPE_UPDATE_QUERIES = 16
+
+LIMITS = (1, 6, 20)
+
+
+@pytest.mark.parametrize('limit', LIMITS)
+def test_recipe_list(user_client, django_assert_num_queries, limit):
+    with django_assert_num_queries(RECIPE_LIST_QUERIES):
+        response = user_client.get('/api/recipes/', {'limit': limit})
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+
+
+@pytest.mark.parametrize('limit', LIMITS)
+def test_recipe_list_anonymous(client, users, django_assert_num_queries,
+                               limit):
+    with django_assert_num_queries(RECIPE_LIST_QUERIES - 1):
+        response = client.get('/api/recipes/', {'limit': limit})
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+
+
+def test_recipe_detail(user_client, django_assert_num_queries):
+    recipe = Recipe.objects.first()
+    with django_assert_num_queries(RECIPE_DETAIL_QUERIES):
+        response = user_client.get(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 200
+    assert len(response.data['ingredients']) == 4
+
+
+@pytest.mark.parametrize('limit', (1, 4))
+@pytest.mark.parametrize('recipes_limit', (None, 1, 3, 50))
+def test_subscriptions(user_client, django_assert_num_queries, limit,
+                       recipes_limit):
+    params = {'limit': limit}
+    if recipes_limit is not None:
+        params['recipes_limit'] = recipes_limit
+    with django_assert_num_queries(SUBSCRIPTIONS_QUERIES):
+        response = user_client.get('/api/users/subscriptions/', params)
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+    for author in response.data['results']:
+        assert len(author['recipes']) == min(
+            author['recipes_count'], recipes_limit or author['recipes_count']
+        )
+
+
+@pytest.mark.parametrize('limit', (1, 6))
+def test_user_list(user_client, django_assert_num_queries, limit):
+    with django_assert_num_queries(USER_LIST_QUERIES):
+        response = user_client.get('/api/users/', {'limit': limit})
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+
+
+@pytest.mark.parametrize('recipes_limit', (None, 2))
+def test_subscriptions_defer_search_vector(user_client, recipes_limit):
+    params = {} if recipes_limit is None else {
+        'recipes_limit': recipes_limit,
+    }
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get('/api/users/subscriptions/', params)
+    assert response.status_code == 200
+    assert not any(
+        'search_vector' in query['sql']
+        for query in queries.captured_queries
+    )
+
+
+@pytest.mark.parametrize('removed', (1, 3))
+def test_recipe_update_removed_ingredients(user, user_client,
+                                           django_assert_num_queries,
+                                           removed):
+    recipe = Recipe.objects.filter(author=user).first()
+    data = {
+        'ingredients': [
+            {'id': ingredient_id, 'amount': amount}
+            for ingredient_id, amount in (
+                recipe.ingredients_in_recipe.values_list(
+                    'ingredient_id', 'amount',
+                )[removed:]
+            )
+        ],
+        'tags': list(recipe.tags.values_list('id', flat=True)),
+    }
+    with django_assert_num_queries(RECIPE_UPDATE_QUERIES):
+        response = user_client.patch(
+            f'/api/recipes/{recipe.pk}/', data, format='json',
+        )
+    assert response.status_code == 200
+    assert len(response.data['ingredients']) == 4 - removed
@@ -0,0 +1,122 @@
+"""
+Планы запросов горячих эндпоинтов: без полного просмотра больших таблиц.
+
+Проверяются те же querysets, что строят вьюсеты: get_queryset()
+и filter_queryset() с параметрами запроса.
+"""
+
+import re
+
+import pytest
+from api.shopping_cart import get_ingredients
+from api.views import CustomUserViewSet, RecipeViewSet
+from django.db import connection
+from recipes.models import Recipe, Tag
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+LARGE_TABLES = (
+    'recipes_recipe',
+    'recipes_recipe_tags',
+    'recipes_ingredient',
+    'recipes_ingredientinrecipe',
+    'recipes_favorite',
+    'recipes_shoppinglist',
+    'recipes_shoppinglistingredient',
+    'users_follow',
+    'users_user',
+)
+# Индексы, просмотр которых по порядку с LIMIT - штатный план
+# постраничной выдачи, а не полный просмотр.
+ORDERED_INDEXES = ('recipe_pub_date_idx',)
+FULL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)()'),
+    'sqlite': re.compile(
+        r'\bSCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?'
+    ),
+}
+PAGE_SIZE = 6
+
+
+def view_queryset(viewset, action, user, params=None, **kwargs):
+    """Queryset, который вьюсет строит для действия и параметров."""
+
+    request = Request(APIRequestFactory().get('/', params))
+    request.user = user
+    view = viewset(
+        action=action,
+        request=request,
+        args=(),
+        kwargs=kwargs,
+        format_kwarg=None,
+    )
+    return view.filter_queryset(view.get_queryset())
+
+
+def get_queries(user):
+    recipe = Recipe.objects.first()
+    tags = Tag.objects.values_list('slug', flat=True)[:3]
+    return {
+        'recipes: list': view_queryset(
+            RecipeViewSet, 'list', user,
+        )[:PAGE_SIZE],
+        'recipes: author': view_queryset(
+            RecipeViewSet, 'list', user, {'author': recipe.author_id},
+        )[:PAGE_SIZE],
+        'recipes: tags': view_queryset(
+            RecipeViewSet, 'list', user, {'tags': list(tags)},
+        )[:PAGE_SIZE],
+        'recipes: is_favorited': view_queryset(
+            RecipeViewSet, 'list', user, {'is_favorited': 1},
+        )[:PAGE_SIZE],
+        'recipes: is_in_shopping_cart': view_queryset(
+            RecipeViewSet, 'list', user, {'is_in_shopping_cart': 1},
+        )[:PAGE_SIZE],
+        'recipes: retrieve': view_queryset(
+            RecipeViewSet, 'retrieve', user, pk=recipe.pk,
+        ).filter(pk=recipe.pk),
+        'recipes: download_shopping_cart': get_ingredients(user),
+        'users: subscriptions': view_queryset(
+            CustomUserViewSet, 'subscriptions', user, {'recipes_limit': 3},
+        )[:PAGE_SIZE],
+        'users: search': view_queryset(
+            CustomUserViewSet, 'list', user, {'search': 'test'},
+        )[:PAGE_SIZE],
+    }
+
+
+def explain(queryset):
+    """
+    План запроса.
+
+    В PostgreSQL последовательный просмотр запрещается на время
+    EXPLAIN: если он всё равно остаётся в плане, подходящего
+    индекса нет, и результат не зависит от объёма тестовых данных.
+    """
+
+    if connection.vendor != 'postgresql':
+        return queryset.explain()
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+    try:
+        return queryset.explain()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = on')
+
+
+def test_no_full_scans(user):
+    pattern = FULL_SCAN.get(connection.vendor)
+    if pattern is None:
+        pytest.skip('Поддерживаются только PostgreSQL и SQLite.')
+    failures = {}
+    for name, queryset in get_queries(user).items():
+        plan = explain(queryset)
+        if any(
+            table in LARGE_TABLES and index not in ORDERED_INDEXES
+            for table, index in pattern.findall(plan)
+        ):
+            failures[name] = plan
+    assert not failures, '\n\n'.join(
+        f'{name}:\n{plan}' for name, plan in failures.items()
+    )
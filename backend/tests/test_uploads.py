@@ -0,0 +1,57 @@
+import struct
+import zlib
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+
+def png_header(width, height):
+    """PNG, в заголовке которого объявлены заданные размеры."""
+
+    def chunk(kind, data):
+        return (
+            struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data))
+        )
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(b'')),
+        chunk(b'IEND', b''),
+    ))
+
+
+@pytest.mark.parametrize('size', (10000, 20000))
+def test_decompression_bomb_is_rejected(user_client, size):
+    response = user_client.put(
+        '/api/users/me/avatar/',
+        {'avatar': SimpleUploadedFile(
+            'bomb.png', png_header(size, size), content_type='image/png',
+        )},
+        format='multipart',
+    )
+    assert response.status_code == 400
+    assert 'пикселей' in str(response.data)
+
+
+def test_api_upload_too_large(user_client, settings):
+    settings.IMAGE_UPLOAD_MAX_SIZE = 1024
+    response = user_client.put(
+        '/api/users/me/avatar/',
+        {'avatar': SimpleUploadedFile('big.png', b'0' * 4096)},
+        format='multipart',
+    )
+    assert response.status_code == 413
+
+
+def test_admin_upload_is_not_limited(client, user, settings):
+    settings.IMAGE_UPLOAD_MAX_SIZE = 1024
+    user.is_staff = user.is_superuser = True
+    user.save()
+    client.force_login(user)
+    response = client.post(
+        '/admin/recipes/recipe/add/',
+        {'image': SimpleUploadedFile('big.png', b'0' * 4096)},
+    )
+    assert response.status_code == 200
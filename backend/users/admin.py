@@ -1,13 +1,13 @@
 # isort: skip_file
 
 from django.contrib import admin
-from foodgram.constants import EMPTY_VALUE
 
+from recipes.mixins import LargeTableAdmin
 from .models import Follow, User
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     """Администрирование для модели пользователей."""
 
     list_display = (
@@ -16,32 +16,36 @@ class UserAdmin(admin.ModelAdmin):
         'username',
         'first_name',
         'last_name',
+        'recipes_count',
+        'followers_count',
     )
     list_filter = (
-        'email',
-        'username',
+        'is_staff',
+        'is_active',
     )
     search_fields = (
-        'email',
-        'username',
+        '^email',
+        '^username',
     )
-    empty_value_display = EMPTY_VALUE
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     """Администрирование для модели подписок."""
 
     list_display = (
         'author',
         'user',
     )
-    list_filter = (
+    list_select_related = (
         'author',
         'user',
     )
-    search_fields = (
+    autocomplete_fields = (
         'author',
         'user',
     )
-    empty_value_display = EMPTY_VALUE
+    search_fields = (
+        '^author__username',
+        '^user__username',
+    )
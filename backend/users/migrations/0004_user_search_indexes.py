@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Выражения совпадают с тем, что Django строит для __istartswith.
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'email')
+INDEX_TEMPLATES = {
+    'postgresql': (
+        'CREATE INDEX user_{field}_prefix_idx ON users_user '
+        '(UPPER({field}::text) text_pattern_ops)'
+    ),
+    'sqlite': (
+        'CREATE INDEX user_{field}_prefix_idx ON users_user '
+        '({field} COLLATE NOCASE)'
+    ),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    template = INDEX_TEMPLATES.get(schema_editor.connection.vendor)
+    if template:
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(template.format(field=field))
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in INDEX_TEMPLATES:
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(
+                f'DROP INDEX IF EXISTS user_{field}_prefix_idx'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -6,11 +6,13 @@ from django.db import models
 from foodgram.constants import (
     MAX_LENGTH_OF_EMAIL,
     MAX_LENGTH_OF_FIRST_NAME,
+    MAX_LENGTH_OF_JTI,
     MAX_LENGTH_OF_LAST_NAME,
 )
+from foodgram.models import MaintainedFieldsModel
 
 
-class User(AbstractUser):
+class User(MaintainedFieldsModel, AbstractUser):
     """Кастомная модель пользователей."""
 
     email = models.EmailField(
@@ -34,7 +36,19 @@ class User(AbstractUser):
         null=True,
     )
 
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+
     USERNAME_FIELD = 'email'
+    maintained_fields = ('recipes_count', 'followers_count')
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
 
     class Meta:
@@ -49,6 +63,58 @@ class User(AbstractUser):
         return self.username
 
 
+class TokenUser(User):
+    """
+    Пользователь, собранный из полей JWT без запроса к БД.
+
+    Поля из токена могут быть устаревшими, поэтому save() записывает
+    их, только если они изменены; остальные поля загружаются
+    при обращении.
+    """
+
+    token_values = {}
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.maintained_fields
+                and not (
+                    field.attname in self.token_values
+                    and getattr(self, field.attname)
+                    == self.token_values[field.attname]
+                )
+            ]
+        super().save(*args, **kwargs)
+
+
+class RevokedToken(models.Model):
+    """Отозванный JWT: хранится, пока не истечёт срок токена."""
+
+    jti = models.CharField(
+        verbose_name='Идентификатор токена',
+        max_length=MAX_LENGTH_OF_JTI,
+        unique=True,
+    )
+    expires = models.DateTimeField(
+        verbose_name='Срок действия',
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return self.jti
+
+
 class Follow(models.Model):
     """Модель подписок."""
 
@@ -74,6 +140,16 @@ class Follow(models.Model):
                 name='unique_follow'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('user', '-id'),
+                name='follow_user_id_idx',
+            ),
+            models.Index(
+                fields=('author', 'user'),
+                name='follow_author_user_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.user.username} подписан на {self.author.username}.'